@@ -0,0 +1,40 @@
+import time
+from typing import Optional
+from loguru import logger
+
+from src.agents.llm_client import LLMUsageTracker
+
+
+class FakeLLMClient:
+    """
+    A drop-in stand-in for `LLMClient` that never leaves the process.
+
+    It sleeps for a fixed latency to mimic the upstream call and records the size of every prompt in `usage`,
+    so end-to-end benchmarks measure our own pipeline rather than Gemini.
+    Static system instructions are counted as sent with every request, as `LLMClient` does.
+    Query-rewrite calls (no system instruction) echo the follow-up question back as the standalone question,
+    so follow-up turns search with a realistic query and still get a company filter.
+    """
+    def __init__(self, latency_s: float = 0.0):
+        self.latency_s = latency_s
+        self.usage = LLMUsageTracker()
+        logger.info(f"Fake LLM Client initialized with {latency_s * 1000:.0f} ms latency.")
+
+    def generate_response(self, prompt: str, system_instruction: Optional[str] = None) -> str:
+        self.usage.record(
+            prompt_bytes=len(prompt.encode("utf-8")),
+            system_instruction_bytes=len(system_instruction.encode("utf-8")) if system_instruction else 0,
+        )
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        if system_instruction is None:
+            return self._follow_up_question(prompt)
+        return "This is a canned benchmark response [cite: www.9fin.com/company_id/1/key_financials]."
+
+    @staticmethod
+    def _follow_up_question(prompt: str) -> str:
+        """Extracts the follow-up question from `Agent.REWRITE_PROMPT_TEMPLATE`, or returns the prompt unchanged."""
+        _, found, rest = prompt.partition("**Follow-up Question:**")
+        if not found:
+            return prompt
+        return rest.partition("**Standalone Question:**")[0].strip()
@@ -0,0 +1,252 @@
+"""
+Benchmarks the retrieval pipeline and the `/chat` endpoint on synthetic corpora.
+
+Usage (from the project root):
+    python -m benchmarks.run_benchmarks --scales 10 1000 --out bench_results.json
+    python -m benchmarks.run_benchmarks --scales 10 1000 --compare bench_results.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import threading
+import importlib
+import subprocess
+import urllib.request
+from pathlib import Path
+from datetime import datetime, timezone
+
+import numpy as np
+from loguru import logger
+
+# The settings object requires an API key at import time; the benchmarks never call Gemini.
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+from src.common.config import settings
+from src.retriever.retriever import Retriever
+from src.agents import llm_client
+from benchmarks.fake_llm import FakeLLMClient
+from benchmarks.synthetic_data import generate_corpus, KEY_FINANCIALS_METRICS, CASH_FLOW_METRICS
+
+SERVER_START_TIMEOUT_S = 60.0
+
+QUERY_TEMPLATES = [
+    "What was the {metric} for {company} in 2024?",
+    "Show {metric} for {company} for the LTM period.",
+    "How did {company}'s {metric} change between 2023 and 2024?",
+    "What is the debt structure of {company}?",
+]
+
+
+def _timed(func, *args, **kwargs) -> tuple[float, object]:
+    """Runs `func` and returns the wall time in seconds with its result."""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def _latency_stats(prefix: str, latencies_s: list[float]) -> dict:
+    """Summarises a list of latencies into percentile and throughput metrics."""
+    latencies_ms = np.array(latencies_s) * 1000
+    return {
+        f"{prefix}_p50_ms": float(np.percentile(latencies_ms, 50)),
+        f"{prefix}_p95_ms": float(np.percentile(latencies_ms, 95)),
+        f"{prefix}_p99_ms": float(np.percentile(latencies_ms, 99)),
+        f"{prefix}_qps": float(len(latencies_s) / sum(latencies_s)),
+    }
+
+
+def _make_queries(companies: list[str], num_queries: int, rng: random.Random) -> list[tuple[str, str]]:
+    """Builds (query, company) pairs from the templates and the companies in the index."""
+    metrics = [metric for metric, _ in KEY_FINANCIALS_METRICS + CASH_FLOW_METRICS]
+    queries = []
+    for _ in range(num_queries):
+        company = rng.choice(companies)
+        query = rng.choice(QUERY_TEMPLATES).format(metric=rng.choice(metrics), company=company)
+        queries.append((query, company))
+    return queries
+
+
+def _point_settings_at(work_dir: Path, data_path: Path):
+    """Redirects the data and checkpoint paths so benchmarks never touch the real checkpoints."""
+    settings.DATA_PATH = data_path
+    settings.CHECKPOINT_DIR = work_dir / "checkpoints"
+    settings.METADATA_PATH = settings.CHECKPOINT_DIR / "metadata.json"
+    settings.FAISS_INDEX_PATH = settings.CHECKPOINT_DIR / "faiss_index.idx"
+    os.makedirs(settings.CHECKPOINT_DIR, exist_ok=True)
+
+
+def benchmark_pipeline(num_queries: int, k: int, rng: random.Random) -> dict:
+    """Times each index build stage, checkpoint I/O, and filtered/unfiltered search."""
+    results = {}
+    retriever = Retriever(auto_load=False)
+
+    results["parse_raw_data_s"], _ = _timed(retriever.parse_raw_data)
+    results["num_documents"] = len(retriever.documents)
+    results["create_embeddings_s"], embeddings = _timed(retriever._create_embeddings)
+    results["build_index_s"], _ = _timed(retriever._build_faiss_index, embeddings)
+    results["save_checkpoints_s"], _ = _timed(retriever._save_checkpoints)
+
+    loaded = Retriever(auto_load=False)
+    results["load_checkpoints_s"], _ = _timed(loaded._load_from_checkpoints)
+
+    queries = _make_queries(list(loaded.company_index.keys()), num_queries, rng)
+
+    # Warm up the embedding model so the first query doesn't skew the percentiles
+    loaded.search(queries[0][0], k=k)
+
+    unfiltered = [_timed(loaded.search, query, k=k)[0] for query, _ in queries]
+    filtered = [_timed(loaded.search, query, k=k, company_filter=company)[0] for query, company in queries]
+    results.update(_latency_stats("search_unfiltered", unfiltered))
+    results.update(_latency_stats("search_filtered", filtered))
+    return results
+
+
+def benchmark_chat(num_requests: int, llm_latency_s: float, port: int, rng: random.Random) -> dict:
+    """
+    Serves `src.main:app` with uvicorn on a local port, backed by the fake LLM, and measures `/chat` latency.
+    Every other request continues the previous conversation so the query rewrite path is exercised too.
+    """
+    import uvicorn
+
+    fake_llm = FakeLLMClient(latency_s=llm_latency_s)
+    llm_client.LLMClient = lambda *args, **kwargs: fake_llm
+    main = importlib.reload(sys.modules["src.main"]) if "src.main" in sys.modules else importlib.import_module("src.main")
+
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+
+    # uvicorn's thread exits without ever setting `started` if it cannot bind the port
+    deadline = time.monotonic() + SERVER_START_TIMEOUT_S
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError(f"Benchmark API server failed to start on port {port}; is the port in use?")
+        if time.monotonic() > deadline:
+            server.should_exit = True
+            raise RuntimeError(f"Benchmark API server did not start within {SERVER_START_TIMEOUT_S}s.")
+        time.sleep(0.05)
+
+    queries = _make_queries(main.agent.known_companies, num_requests, rng)
+    latencies, conversation_id = [], None
+    try:
+        for i, (query, _) in enumerate(queries):
+            payload = {"query": query}
+            if i % 2 == 1 and conversation_id:
+                payload["conversation_id"] = conversation_id
+
+            request = urllib.request.Request(
+                f"http://127.0.0.1:{port}/chat",
+                data=json.dumps(payload).encode("utf-8"),
+                headers={"Content-Type": "application/json"},
+            )
+            elapsed, response = _timed(urllib.request.urlopen, request)
+            conversation_id = json.loads(response.read())["conversation_id"]
+            latencies.append(elapsed)
+    finally:
+        server.should_exit = True
+        thread.join()
+
+    usage = fake_llm.usage.snapshot()
+    results = _latency_stats("chat", latencies)
+    results["chat_prompt_bytes_mean"] = usage["prompt_bytes_per_request"]
+    results["chat_llm_bytes_sent_mean"] = usage["bytes_sent_per_request"]
+    return results
+
+
+def compare_results(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Compares two result files and returns a description of every regression beyond `tolerance`.
+    Latencies (`_s`, `_ms`) and payload sizes (`_bytes_`) regress when they grow; throughput (`_qps`) regresses when it shrinks.
+    """
+    regressions = []
+    for scale, metrics in current["results"].items():
+        for name, value in metrics.items():
+            base = baseline["results"].get(scale, {}).get(name)
+            if not base:
+                continue
+
+            change = (value - base) / base
+            lower_is_better = name.endswith(("_s", "_ms")) or "_bytes_" in name
+            if lower_is_better and change > tolerance:
+                regressions.append(f"{scale}/{name}: {base:.4f} -> {value:.4f} (+{change:.0%})")
+            elif name.endswith("_qps") and change < -tolerance:
+                regressions.append(f"{scale}/{name}: {base:.2f} -> {value:.2f} ({change:.0%})")
+    return regressions
+
+
+def _git_commit() -> str | None:
+    """Returns the short hash of the benchmarked commit, if run from a git checkout."""
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(args: argparse.Namespace) -> dict:
+    """Runs every benchmark for each configured scale and returns the machine-readable results."""
+    rng = random.Random(args.seed)
+    output = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "embedding_model": settings.EMBEDDING_MODEL,
+            "chunking_mode": settings.CHUNKING_MODE,
+            "k": args.k,
+            "seed": args.seed,
+        },
+        "results": {},
+    }
+
+    for scale in args.scales:
+        logger.info(f"--- Benchmarking {scale} companies ---")
+        work_dir = args.work_dir / f"scale_{scale}"
+        data_path = generate_corpus(scale, work_dir / "financial_data.json", seed=args.seed)
+        _point_settings_at(work_dir, data_path)
+
+        results = benchmark_pipeline(args.queries, args.k, rng)
+        if args.chat_requests:
+            results.update(benchmark_chat(args.chat_requests, args.llm_latency_ms / 1000, args.port, rng))
+
+        output["results"][str(scale)] = results
+        logger.info(f"Results for {scale} companies: {json.dumps(results, indent=2)}")
+
+    return output
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the retrieval pipeline and /chat endpoint.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[10, 1000], help="Corpus sizes in companies (10 to 100k).")
+    parser.add_argument("--queries", type=int, default=200, help="Search queries per scale and filter mode.")
+    parser.add_argument("--k", type=int, default=settings.RETRIEVAL_K, help="Number of documents retrieved per search.")
+    parser.add_argument("--chat-requests", type=int, default=100, help="End-to-end /chat requests per scale (0 to skip).")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Simulated latency of the fake LLM.")
+    parser.add_argument("--port", type=int, default=8765, help="Local port for the benchmark API server.")
+    parser.add_argument("--work-dir", type=Path, default=Path("benchmarks/.work"), help="Where corpora and checkpoints are written.")
+    parser.add_argument("--out", type=Path, default=Path("bench_results.json"), help="Where to write the JSON results.")
+    parser.add_argument("--compare", type=Path, help="Baseline results file to check for regressions.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown before flagging a regression.")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for corpora and queries.")
+    parser.add_argument("--log-level", default="WARNING", help="Loguru level; per-search logging skews latencies at lower levels.")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level)
+
+    output = run_benchmarks(args)
+    with open(args.out, 'w') as f:
+        json.dump(output, f, indent=2)
+    logger.success(f"Benchmark results written to {args.out}")
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare_results(output, baseline, args.tolerance)
+        if regressions:
+            logger.error("Performance regressions against {}:\n{}", args.compare, "\n".join(regressions))
+            sys.exit(1)
+        logger.success(f"No regressions beyond {args.tolerance:.0%} against {args.compare}.")
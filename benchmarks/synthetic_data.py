@@ -0,0 +1,142 @@
+import json
+import random
+import argparse
+from pathlib import Path
+from loguru import logger
+
+PERIODS = [
+    {"date": "2023-12-31", "period": "Annual"},
+    {"date": "2024-12-31", "period": "Annual"},
+    {"date": "2025-06-30", "period": "LTM"},
+]
+
+KEY_FINANCIALS_METRICS = [
+    ("Sales", "USDm"),
+    ("Gross profit", "USDm"),
+    ("Gross profit margin", "%"),
+    ("Operating profit", "USDm"),
+    ("Operating profit margin", "%"),
+    ("Adjusted EBITDA", "USDm"),
+    ("Adjusted EBITDA margin", "%"),
+]
+
+CASH_FLOW_METRICS = [
+    ("Capex", "USDm"),
+    ("Capex margin", "%"),
+    ("Change in working capital", "USDm"),
+    ("Cash from operating activities", "USDm"),
+    ("Cash from investing activities", "USDm"),
+    ("Cash from financing activities", "USDm"),
+    ("Net change in cash", "USDm"),
+    ("Total debt", "USDm"),
+    ("Total cash", "USDm"),
+    ("Net debt", "USDm"),
+    ("Net leverage", "x"),
+    ("Gross leverage", "x"),
+    ("Interest coverage", "x"),
+]
+
+NAME_PREFIXES = ["Tron", "Chem", "Miner", "Petro", "Agri", "Steel", "Medi", "Tele", "Aero", "Logi"]
+NAME_SUFFIXES = ["Holdings", "International", "Group", "Industries", "Partners", "Corp"]
+
+
+def _metric_rows(rng: random.Random, metrics: list[tuple[str, str]], scale: float) -> list[dict]:
+    """Generates metric rows with one value per period, roughly in the ranges of the real data."""
+    rows = []
+    for metric, unit in metrics:
+        if unit == "USDm":
+            base = rng.uniform(-0.3, 1.0) * scale
+            values = [round(base * rng.uniform(0.9, 1.1), 1) for _ in PERIODS]
+        elif unit == "%":
+            values = [round(rng.uniform(-15.0, 30.0), 1) for _ in PERIODS]
+        else:
+            values = [round(rng.uniform(0.5, 8.0), 1) for _ in PERIODS]
+        rows.append({"metric": metric, "unit": unit, "values": values})
+    return rows
+
+
+def _cap_table_rows(rng: random.Random, scale: float) -> list[dict]:
+    """Generates a cap table with secured and unsecured instruments followed by their subtotals."""
+    def instrument(name, security, maturity, rate):
+        return {
+            "name": name,
+            "note": None,
+            "security": security,
+            "maturity": maturity,
+            "rate": rate,
+            "amount_usdm": round(rng.uniform(0.02, 0.4) * scale, 1),
+            "x_ebitda": round(rng.uniform(0.0, 2.0), 2),
+            "percent_cap": round(rng.uniform(0.0, 30.0), 2),
+        }
+
+    def subtotal(name):
+        row = instrument(name, None, None, None)
+        row["subtotal"] = True
+        return row
+
+    year = rng.randint(2027, 2033)
+    return [
+        instrument(f"${rng.randint(1, 9) * 50}m Revolving Credit Facility due {year}", "Secured", f"Aug-{year}", "S+175-225"),
+        instrument(f"${rng.randint(2, 20) * 50}m Term Loan B due {year + 1}", "Secured", f"Apr-{year + 1}", "S+225"),
+        subtotal("Gross Secured Debt"),
+        subtotal("Net Secured Debt"),
+        instrument(f"${rng.randint(2, 20) * 50}m Senior Notes due {year + 2}", "Unsecured", f"Mar-{year + 2}", f"{rng.uniform(3, 9):.3f}%"),
+        instrument("Finance Leases", None, None, None),
+        subtotal("Gross Debt"),
+        instrument("Cash and Cash Equivalents", None, None, None),
+        subtotal("Net Debt"),
+        instrument("Market Capitalization", None, None, None),
+        subtotal("Net Capitalization"),
+    ]
+
+
+def generate_company(company_id: int, rng: random.Random) -> dict:
+    """Generates one `company_financials` record shaped like the rows in `data/financial_data.json`."""
+    name = f"{rng.choice(NAME_PREFIXES)}{company_id} {rng.choice(NAME_SUFFIXES)}"
+    scale = rng.uniform(500.0, 10000.0)
+    return {
+        "company_id": company_id,
+        "company": name,
+        "currency": "USD millions",
+        "periods": PERIODS,
+        "key_financials": {
+            "url": f"/company_id/{company_id}/key_financials",
+            "rows": _metric_rows(rng, KEY_FINANCIALS_METRICS, scale),
+        },
+        "cash_flow_and_leverage": {
+            "url": f"/company_id/{company_id}/cash_flow_and_leverage",
+            "rows": _metric_rows(rng, CASH_FLOW_METRICS, scale),
+        },
+        "cap_table": {
+            "as_of": PERIODS[-1]["date"],
+            "url": f"/company_id/{company_id}/cap_table",
+            "rows": _cap_table_rows(rng, scale),
+        },
+    }
+
+
+def generate_corpus(num_companies: int, out_path: Path, seed: int = 42) -> Path:
+    """
+    Writes a synthetic `financial_data.json` with `num_companies` companies to `out_path`.
+
+    The same seed always yields the same corpus, so results stay comparable across commits.
+    """
+    rng = random.Random(seed)
+    corpus = {"company_financials": [generate_company(company_id, rng) for company_id in range(1, num_companies + 1)]}
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, 'w') as f:
+        json.dump(corpus, f)
+
+    logger.info(f"Wrote synthetic corpus with {num_companies} companies to {out_path}")
+    return out_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic financial_data.json corpus.")
+    parser.add_argument("--companies", type=int, default=1000, help="Number of companies to generate.")
+    parser.add_argument("--out", type=Path, default=Path("benchmarks/data/financial_data.json"), help="Output path.")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed.")
+    args = parser.parse_args()
+
+    generate_corpus(args.companies, args.out, args.seed)
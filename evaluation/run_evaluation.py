@@ -1,8 +1,13 @@
 import os
 import json
-import requests
+import math
+import asyncio
+import hashlib
+import argparse
+import httpx
 from datasets import Dataset
 from ragas import evaluate
+from ragas.run_config import RunConfig
 from ragas.metrics import (
     faithfulness,
     answer_relevancy,
@@ -18,87 +23,222 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
 # --- Configuration ---
 API_URL = "http://127.0.0.1:8000/chat"
-EVAL_DATASET_PATH = os.path.join(os.path.dirname(__file__), "eval_dataset.json")
+EVAL_DIR = os.path.dirname(__file__)
+EVAL_DATASET_PATH = os.path.join(EVAL_DIR, "eval_dataset.json")
+# Per-turn agent outputs, appended as they arrive so an interrupted run can resume
+TURN_RESULTS_PATH = os.path.join(EVAL_DIR, "results", "turns.jsonl")
+# Per-sample judge scores, keyed by a hash of the sample so unchanged answers are never re-scored
+SCORE_CACHE_PATH = os.path.join(EVAL_DIR, "results", "scores_cache.jsonl")
 
-def get_agent_response(query: str, conversation_id: str = None) -> dict:
+METRICS = [
+    faithfulness,       # How factually consistent is the answer with the context? (Measures hallucination)
+    context_precision,  # Is the retrieved context relevant?
+    context_recall,     # Did we retrieve all the necessary context?
+]
+
+
+def _read_jsonl(path: str) -> list[dict]:
+    """Reads a JSONL file, returning an empty list if it does not exist yet."""
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _append_jsonl(path: str, records: list[dict]):
+    """Appends records to a JSONL file and flushes them to disk immediately."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a') as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+        f.flush()
+
+
+async def get_agent_response(client: httpx.AsyncClient, query: str, conversation_id: str = None) -> dict:
     """Calls the local chat API and returns the JSON response."""
-    payload = {"query": query, "evaluate": "True"}
+    payload = {"query": query, "evaluate": True}
     if conversation_id:
         payload["conversation_id"] = conversation_id
-    
-    response = requests.post(API_URL, json=payload)
+
+    response = await client.post(API_URL, json=payload)
     response.raise_for_status() # Will raise an error for 4xx/5xx responses
     return response.json()
 
-def run_evaluation():
+
+async def run_conversation(client: httpx.AsyncClient, semaphore: asyncio.Semaphore, test: dict, results_path: str):
+    """
+    Runs all turns of one test conversation in order, checkpointing each turn as it completes.
+    A failed turn aborts the conversation, since later turns depend on its history; it is retried on resume.
+    """
+    async with semaphore:
+        print(f"Running test: {test['test_id']}...")
+        conversation_id = None
+        for turn_index, turn in enumerate(test["turns"]):
+            question = turn["question"]
+
+            try:
+                api_response = await get_agent_response(client, question, conversation_id)
+            except httpx.HTTPError as e:
+                print(f"  - [{test['test_id']}] Question: '{question}' -> FAIL (API Error: {e})")
+                return
+
+            conversation_id = api_response["conversation_id"] # Maintain conversation state
+            _append_jsonl(results_path, [{
+                "test_id": test["test_id"],
+                "turn_index": turn_index,
+                "question": question,
+                "answer": api_response["response"],
+                "contexts": api_response["retrieved_context"] or [],
+                "ground_truth": turn["ground_truth_answer"],
+            }])
+            print(f"  - [{test['test_id']}] Question: '{question}' -> PASS")
+
+
+def load_completed_turns(eval_tests: list[dict], results_path: str) -> dict[str, list[dict]]:
+    """
+    Returns the checkpointed turns of every conversation that finished all of its turns.
+    Partially completed conversations are dropped and re-run, since the server-side history is not resumable,
+    as are conversations whose questions were edited in the dataset since they were checkpointed.
+    Reference answers are taken from the current dataset, so an edited ground truth is scored again.
+    """
+    turns_by_test: dict[str, dict[int, dict]] = {}
+    for record in _read_jsonl(results_path):
+        turns_by_test.setdefault(record["test_id"], {})[record["turn_index"]] = record
+
+    completed = {}
+    for test in eval_tests:
+        turns = turns_by_test.get(test["test_id"], {})
+        if sorted(turns) != list(range(len(test["turns"]))):
+            continue
+        if any(turns[i]["question"] != turn["question"] for i, turn in enumerate(test["turns"])):
+            print(f"Questions of {test['test_id']} changed since they were checkpointed; re-running it.")
+            continue
+        completed[test["test_id"]] = [
+            {**turns[i], "ground_truth": turn["ground_truth_answer"]} for i, turn in enumerate(test["turns"])
+        ]
+    return completed
+
+
+async def collect_responses(eval_tests: list[dict], results_path: str, concurrency: int) -> list[dict]:
+    """
+    Runs every pending conversation against the API concurrently over a pooled HTTP client,
+    then returns the turn results of all completed conversations in dataset order.
+    """
+    completed = load_completed_turns(eval_tests, results_path)
+    pending = [test for test in eval_tests if test["test_id"] not in completed]
+    print(f"{len(completed)} conversations already completed, {len(pending)} to run with concurrency {concurrency}.")
+
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=httpx.Timeout(120.0)) as client:
+        await asyncio.gather(*(run_conversation(client, semaphore, test, results_path) for test in pending))
+
+    completed = load_completed_turns(eval_tests, results_path)
+    return [turn for test in eval_tests for turn in completed.get(test["test_id"], [])]
+
+
+def _sample_key(turn: dict) -> str:
+    """Hashes everything the judge sees, so a cached score is reused only for an identical sample."""
+    sample = {
+        "metrics": [metric.name for metric in METRICS],
+        "question": turn["question"],
+        "answer": turn["answer"],
+        "contexts": turn["contexts"],
+        "ground_truth": turn["ground_truth"],
+    }
+    return hashlib.sha256(json.dumps(sample, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _is_fully_scored(scores: dict) -> bool:
+    """True if the judge returned a finite score for every metric."""
+    return all(
+        isinstance(scores.get(metric.name), (int, float)) and math.isfinite(scores[metric.name])
+        for metric in METRICS
+    )
+
+
+def score_turns(turns: list[dict], cache_path: str, batch_size: int, judge_workers: int) -> list[dict]:
+    """
+    Scores turns with Ragas in batches, reusing cached judge scores for samples seen in earlier runs.
+    Each finished batch is appended to the cache, so scoring is resumable as well. Samples the judge
+    failed to score (NaN, e.g. after rate limiting) are reported for this run but not cached, so they are retried.
+    """
+    cache = {record["key"]: record["scores"] for record in _read_jsonl(cache_path) if _is_fully_scored(record["scores"])}
+    keys = [_sample_key(turn) for turn in turns]
+    uncached = [(key, turn) for key, turn in zip(keys, turns) if key not in cache]
+    print(f"{len(turns) - len(uncached)} samples scored from cache, {len(uncached)} to score in batches of {batch_size}.")
+
+    if uncached:
+        gemini_llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash-lite", google_api_key=GEMINI_API_KEY)
+        google_embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001", google_api_key=GEMINI_API_KEY)
+
+    for start in range(0, len(uncached), batch_size):
+        batch = uncached[start:start + batch_size]
+        dataset = Dataset.from_dict({
+            "question": [turn["question"] for _, turn in batch],
+            "answer": [turn["answer"] for _, turn in batch],
+            "contexts": [turn["contexts"] for _, turn in batch],
+            "ground_truth": [turn["ground_truth"] for _, turn in batch],
+        })
+
+        result = evaluate(
+            dataset=dataset,
+            metrics=METRICS,
+            llm=gemini_llm,
+            embeddings=google_embeddings,
+            run_config=RunConfig(max_workers=judge_workers),
+        )
+
+        scores = result.to_pandas()[[metric.name for metric in METRICS]].to_dict(orient="records")
+        records = [{"key": key, "scores": row_scores} for (key, _), row_scores in zip(batch, scores)]
+        scored = [record for record in records if _is_fully_scored(record["scores"])]
+        _append_jsonl(cache_path, scored)
+        cache.update({record["key"]: record["scores"] for record in records})
+        print(f"  - Scored {min(start + batch_size, len(uncached))}/{len(uncached)} samples ({len(records) - len(scored)} judge failures, will retry)")
+
+    return [cache[key] for key in keys]
+
+
+def run_evaluation(args: argparse.Namespace):
     """
     Loads the evaluation dataset, runs it against the agent, and scores the results with Ragas.
     """
     print("--- Starting Evaluation ---")
-    
+
     with open(EVAL_DATASET_PATH, 'r') as f:
         eval_tests = json.load(f)
 
-    results_data = {
-        "question": [],
-        "answer": [],
-        "contexts": [],
-        "ground_truth": []
-    }
+    if args.fresh and os.path.exists(args.results_path):
+        os.remove(args.results_path)
 
     # --- Run all test cases and collect results ---
-    for test in eval_tests[:]:
-        print(f"\nRunning test: {test['test_id']}...")
-        conversation_id = None
-        for turn in test["turns"]:
-            question = turn["question"]
-            ground_truth = turn["ground_truth_answer"]
-            
-            try:
-                api_response = get_agent_response(question, conversation_id)
-                answer = api_response["response"]
-                retrieved_context = api_response["retrieved_context"]
-                conversation_id = api_response["conversation_id"] # Maintain conversation state
-                
-                # Append data for Ragas
-                results_data["question"].append(question)
-                results_data["answer"].append(answer)
-                results_data["contexts"].append(retrieved_context)
-                results_data["ground_truth"].append(ground_truth)
-                print(f"  - Question: '{question}' -> PASS")
-
-            except requests.RequestException as e:
-                print(f"  - Question: '{question}' -> FAIL (API Error: {e})")
+    turns = asyncio.run(collect_responses(eval_tests, args.results_path, args.concurrency))
 
     # --- Evaluate the collected results with Ragas ---
-    if not results_data["question"]:
+    if not turns:
         print("\nNo results collected. Skipping Ragas evaluation.")
         return
 
-    # Convert our results into a Hugging Face Dataset object
-    dataset = Dataset.from_dict(results_data)
-
     print("\n--- Ragas Evaluation ---")
-    # Define the metrics we want to calculate
-    metrics = [
-        faithfulness,       # How factually consistent is the answer with the context? (Measures hallucination)
-        context_precision,  # Is the retrieved context relevant?
-        context_recall,     # Did we retrieve all the necessary context?
-    ]
-    gemini_llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash-lite", google_api_key=GEMINI_API_KEY)
-    google_embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001", google_api_key=GEMINI_API_KEY)
-
-    # Run the evaluation
-    result = evaluate(
-        dataset=dataset,
-        metrics=metrics,
-        llm=gemini_llm,
-        embeddings=google_embeddings
-    )
+    scores = score_turns(turns, args.score_cache_path, args.batch_size, args.judge_workers)
+
+    # Aggregate per-sample scores, ignoring samples the judge could not score (NaN)
+    result = {}
+    for metric in METRICS:
+        values = [s[metric.name] for s in scores if s.get(metric.name) is not None and not math.isnan(s[metric.name])]
+        result[metric.name] = sum(values) / len(values) if values else None
 
     # Print the results
-    print("\nEvaluation Results:")
+    print(f"\nEvaluation Results ({len(turns)} turns):")
     print(result)
 
+
 if __name__ == "__main__":
-    run_evaluation()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run the agent evaluation against the local chat API.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Number of conversations run in parallel.")
+    parser.add_argument("--batch-size", type=int, default=50, help="Number of samples scored per Ragas call.")
+    parser.add_argument("--judge-workers", type=int, default=16, help="Concurrent judge LLM calls within a Ragas batch.")
+    parser.add_argument("--results-path", default=TURN_RESULTS_PATH, help="JSONL checkpoint of per-turn agent outputs.")
+    parser.add_argument("--score-cache-path", default=SCORE_CACHE_PATH, help="JSONL cache of per-sample judge scores.")
+    parser.add_argument("--fresh", action="store_true", help="Discard checkpointed turns and re-run every conversation.")
+    run_evaluation(parser.parse_args())
@@ -0,0 +1,186 @@
+"""
+Offline retrieval evaluation: scores `Retriever.search` against the `expected_source_urls`
+annotated in `eval_dataset.json`, without the API server or any LLM calls.
+
+Usage (from the project root):
+    python -m evaluation.run_retrieval_evaluation --backends flat hnsw ivf --k 1 3 5 10
+"""
+import os
+import sys
+import json
+import math
+import time
+import argparse
+
+import faiss
+import numpy as np
+from loguru import logger
+
+# The settings object requires an API key at import time; this evaluation never calls Gemini.
+os.environ.setdefault("GEMINI_API_KEY", "offline-eval")
+
+from src.retriever.retriever import Retriever
+from src.agents.agent import Agent
+
+EVAL_DATASET_PATH = os.path.join(os.path.dirname(__file__), "eval_dataset.json")
+
+INDEX_BACKENDS = ["flat", "hnsw", "ivf"]
+FILTER_STRATEGIES = ["none", "company", "oracle"]
+
+
+def load_queries(dataset_path: str) -> list[dict]:
+    """
+    Flattens the annotated turns of the eval dataset into retrieval queries.
+    Follow-up turns are searched with their `standalone_question`, as the agent would after rewriting them.
+    """
+    with open(dataset_path, 'r') as f:
+        eval_tests = json.load(f)
+
+    queries = []
+    for test in eval_tests:
+        for turn in test["turns"]:
+            if not turn.get("expected_source_urls"):
+                logger.warning(f"Skipping un-annotated turn in {test['test_id']}: '{turn['question']}'")
+                continue
+            queries.append({
+                "test_id": test["test_id"],
+                "query": turn.get("standalone_question", turn["question"]),
+                "expected": set(turn["expected_source_urls"]),
+            })
+    return queries
+
+
+def ivf_nlist(num_vectors: int) -> int:
+    """Roughly sqrt(N) IVF lists, but never more than the data can train (FAISS wants ~39 points per list)."""
+    return max(1, min(int(math.sqrt(num_vectors)), num_vectors // 39))
+
+
+def build_index(backend: str, vectors: np.ndarray, ids: np.ndarray, nprobe: int) -> faiss.Index:
+    """Builds an ID-mapped FAISS index of the given backend type over the retriever's document vectors."""
+    dimension = vectors.shape[1]
+    if backend == "flat":
+        index = faiss.IndexFlatL2(dimension)
+    elif backend == "hnsw":
+        index = faiss.IndexHNSWFlat(dimension, 32)
+    elif backend == "ivf":
+        nlist = ivf_nlist(len(vectors))
+        index = faiss.IndexIVFFlat(faiss.IndexFlatL2(dimension), dimension, nlist)
+        index.train(vectors)
+        index.nprobe = min(nprobe, nlist)
+    else:
+        raise ValueError(f"Unknown index backend: '{backend}'. Expected one of {INDEX_BACKENDS}.")
+
+    index = faiss.IndexIDMap(index)
+    index.add_with_ids(vectors, ids)
+    return index
+
+
+def _ranked_source_urls(documents: list) -> list[str]:
+    """Collapses retrieved documents to their source URLs in rank order, so row chunks of one table count once."""
+    return list(dict.fromkeys(doc.metadata.source_url for doc in documents))
+
+
+def score_ranking(ranked_urls: list[str], expected: set[str], k: int) -> dict:
+    """Computes recall@k, reciprocal rank and binary-relevance nDCG@k for a single query."""
+    top_k = ranked_urls[:k]
+    hits = [url in expected for url in top_k]
+
+    reciprocal_rank = next((1 / (rank + 1) for rank, hit in enumerate(hits) if hit), 0.0)
+    dcg = sum(1 / math.log2(rank + 2) for rank, hit in enumerate(hits) if hit)
+    ideal_dcg = sum(1 / math.log2(rank + 2) for rank in range(min(len(expected), k)))
+    return {
+        "recall": sum(hits) / len(expected),
+        "mrr": reciprocal_rank,
+        "ndcg": dcg / ideal_dcg,
+    }
+
+
+def evaluate_config(retriever: Retriever, agent: Agent, queries: list[dict], k: int, filter_strategy: str, url_to_company: dict) -> dict:
+    """Runs every query against the retriever's current index and averages quality and latency metrics."""
+    scores, latencies_ms = [], []
+    for query in queries:
+        if filter_strategy == "company":
+            company_filter = agent._extract_company_filter(query["query"])
+        elif filter_strategy == "oracle":
+            company_filter = url_to_company.get(next(iter(query["expected"])))
+        else:
+            company_filter = None
+
+        start = time.perf_counter()
+        documents = retriever.search(query["query"], k=k, company_filter=company_filter)
+        latencies_ms.append((time.perf_counter() - start) * 1000)
+
+        scores.append(score_ranking(_ranked_source_urls(documents), query["expected"], k))
+
+    return {
+        "recall@k": float(np.mean([s["recall"] for s in scores])),
+        "mrr": float(np.mean([s["mrr"] for s in scores])),
+        "ndcg@k": float(np.mean([s["ndcg"] for s in scores])),
+        "latency_p50_ms": float(np.percentile(latencies_ms, 50)),
+        "latency_p95_ms": float(np.percentile(latencies_ms, 95)),
+    }
+
+
+def run_retrieval_evaluation(args: argparse.Namespace) -> list[dict]:
+    """Evaluates every combination of index backend, k and filter strategy, and prints a summary table."""
+    print("--- Starting Offline Retrieval Evaluation ---")
+    queries = load_queries(args.dataset)
+    if not queries:
+        print("No annotated turns found. Add `expected_source_urls` to the eval dataset.")
+        return []
+
+    retriever = Retriever()
+    # The agent is only used for its company extraction, so it needs no LLM client
+    agent = Agent(retriever=retriever, llm_client=None)
+    url_to_company = {doc.metadata.source_url: doc.metadata.company_name for doc in retriever.documents.values()}
+
+    # Re-use the stored document vectors to build each candidate backend without re-embedding
+    base_index = retriever.faiss_index
+    vectors = faiss.downcast_index(base_index.index).reconstruct_n(0, base_index.ntotal)
+    ids = faiss.vector_to_array(base_index.id_map).astype('int64')
+
+    rows = []
+    for backend in args.backends:
+        nlist = ivf_nlist(len(vectors)) if backend == "ivf" else None
+        if nlist is not None and nlist < 2:
+            # A single list is an exhaustive scan; reporting it as IVF would be misleading
+            logger.warning(f"Skipping 'ivf': {len(vectors)} documents only support nlist={nlist}, which is a flat scan.")
+            continue
+
+        retriever.faiss_index = build_index(backend, vectors, ids, args.nprobe)
+        for filter_strategy in args.filters:
+            for k in args.k:
+                metrics = evaluate_config(retriever, agent, queries, k, filter_strategy, url_to_company)
+                rows.append({"backend": backend, "nlist": nlist, "filter": filter_strategy, "k": k, **metrics})
+    retriever.faiss_index = base_index
+
+    print(f"\nRetrieval Results ({len(queries)} queries, {len(retriever.documents)} documents, chunking mode '{retriever.chunking_mode}'):")
+    print(f"{'backend':<8} {'nlist':>5} {'filter':<8} {'k':>3} {'recall@k':>9} {'mrr':>6} {'ndcg@k':>7} {'p50 ms':>8} {'p95 ms':>8}")
+    for row in rows:
+        print(
+            f"{row['backend']:<8} {row['nlist'] or '-':>5} {row['filter']:<8} {row['k']:>3} {row['recall@k']:>9.3f} {row['mrr']:>6.3f} "
+            f"{row['ndcg@k']:>7.3f} {row['latency_p50_ms']:>8.2f} {row['latency_p95_ms']:>8.2f}"
+        )
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate retrieval quality and latency offline, without LLM calls.")
+    parser.add_argument("--dataset", default=EVAL_DATASET_PATH, help="Eval dataset annotated with expected_source_urls.")
+    parser.add_argument("--backends", nargs="+", default=INDEX_BACKENDS, choices=INDEX_BACKENDS, help="FAISS index backends to compare.")
+    parser.add_argument("--filters", nargs="+", default=FILTER_STRATEGIES, choices=FILTER_STRATEGIES,
+                        help="'none' searches everything, 'company' uses the agent's company extraction, 'oracle' filters to the expected company.")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5, 10], help="Values of k to evaluate.")
+    parser.add_argument("--nprobe", type=int, default=8, help="Number of IVF lists probed per query.")
+    parser.add_argument("--out", help="Optional path to write the results as JSON.")
+    parser.add_argument("--log-level", default="WARNING", help="Loguru level; per-search logging skews latencies at lower levels.")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level)
+
+    results = run_retrieval_evaluation(args)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.out}")
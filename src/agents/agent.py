@@ -1,4 +1,5 @@
 from ..retriever.retriever import Retriever
+from ..common.config import settings
 from .llm_client import LLMClient
 from typing import List, Dict, Optional
 from loguru import logger
@@ -20,7 +21,9 @@ Based on the chat history provided, rewrite the user's 'Follow-up Question' into
 **Standalone Question:**
 """
 
-    ANSWER_PROMPT_TEMPLATE = """
+    # Static instructions, sent with every request through the LLM's system-instruction slot.
+    # Keeping them out of the prompt lets Gemini's implicit prefix caching discount the repeated tokens.
+    ANSWER_SYSTEM_INSTRUCTION = """
 You are a highly specialized financial analyst AI assistant for 9fin. Your purpose is to answer questions strictly based on the financial data provided in the 'CONTEXT' section.
 
 **Available Data Tables:**
@@ -43,9 +46,10 @@ You have access to the following financial tables for each company:
 - For numerical data, present it clearly with appropriate units.
 - For comparisons or summaries, use bullet points.
 - Always attach citations after the relevant information. For example: "The sales for Tronox in 2024 were 3,074 USD millions [cite: www.9fin.com/company_id/1/key_financials]."
+"""
 
---------------------
-
+    # The per-request part of the answer prompt
+    ANSWER_PROMPT_TEMPLATE = """
 **CONTEXT:**
 {context_str}
 
@@ -72,8 +76,8 @@ You have access to the following financial tables for each company:
     def _build_prompt(self, query: str, context_docs: List, history: Optional[List[Dict[str, str]]] = None) -> str:
         """Constructs the final prompt string from the template."""
         
-        # Format the context documents into a readable string
-        context_str = "\n\n---\n\n".join([f"Source URL: {doc.metadata.source_url}\n\n{doc.content}" for doc in context_docs])
+        # Join the context documents' pre-rendered blocks, computed once at index load
+        context_str = "\n\n---\n\n".join([doc.prompt_block for doc in context_docs])
         if not context_docs:
             context_str = "No relevant data found in the knowledge base."
 
@@ -122,13 +126,16 @@ You have access to the following financial tables for each company:
 
         # Call the Retriever to get context
         logger.info(f"Searching for context with query: '{query}' and filter: '{company_filter}'")
-        context_documents = self.retriever.search(standalone_query, k=10, company_filter=company_filter)
+        context_documents = self.retriever.search(standalone_query, k=settings.RETRIEVAL_K, company_filter=company_filter)
+
+        # In row chunking mode, merge matched rows back under their parent table headings
+        context_documents = self.retriever.reassemble(context_documents)
 
         # Build the prompt
         prompt = self._build_prompt(query, context_documents, conversation_history)
         logger.debug(f"Constructed prompt for LLM:\n{prompt[:1000]}...")  # Log a snippet of the prompt
 
         # Call the LLM to get the final answer
-        response = self.llm_client.generate_response(prompt)
+        response = self.llm_client.generate_response(prompt, system_instruction=self.ANSWER_SYSTEM_INSTRUCTION)
         
         return response, context_documents
\ No newline at end of file
@@ -1,7 +1,45 @@
+import threading
 import google.generativeai as genai
+from typing import Dict, Optional
 from ..common.config import settings
 from loguru import logger
 
+
+class LLMUsageTracker:
+    """
+    Thread-safe counters for what we send upstream, so payload and caching savings can be confirmed.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.prompt_bytes = 0              # Variable, per-request part of the prompt
+        self.system_instruction_bytes = 0  # Static system instruction, still sent with every request
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+
+    def record(self, prompt_bytes: int, system_instruction_bytes: int, prompt_tokens: int = 0, cached_tokens: int = 0):
+        with self._lock:
+            self.requests += 1
+            self.prompt_bytes += prompt_bytes
+            self.system_instruction_bytes += system_instruction_bytes
+            self.prompt_tokens += prompt_tokens
+            self.cached_tokens += cached_tokens
+
+    def snapshot(self) -> dict:
+        """Returns the totals and per-request averages."""
+        with self._lock:
+            requests = max(self.requests, 1)
+            return {
+                "requests": self.requests,
+                "bytes_sent_total": self.prompt_bytes + self.system_instruction_bytes,
+                "bytes_sent_per_request": (self.prompt_bytes + self.system_instruction_bytes) / requests,
+                "prompt_bytes_per_request": self.prompt_bytes / requests,
+                "system_instruction_bytes_per_request": self.system_instruction_bytes / requests,
+                "prompt_tokens_per_request": self.prompt_tokens / requests,
+                "cached_tokens_per_request": self.cached_tokens / requests,
+            }
+
+
 class LLMClient:
     """
     A client for interacting with the Google Gemini API.
@@ -9,27 +47,61 @@ class LLMClient:
     def __init__(self, api_key: str = settings.GEMINI_API_KEY):
         if not api_key:
             raise ValueError("Google API key is missing. Please set the GEMINI_API_KEY environment variable.")
-        
+
         # Configure the generative AI client with the API key
         genai.configure(api_key=api_key)
-        
+
         # Initialize the model. We can make the model name a setting later.
         self.model = genai.GenerativeModel(settings.LLM_MODEL)
         logger.info(f"LLM Client initialized with model: {settings.LLM_MODEL}")
 
-    def generate_response(self, prompt: str) -> str:
+        # One model per static system instruction, built once and reused across requests.
+        # The instruction is still sent with every request; Gemini's implicit caching of the repeated prefix
+        # is what saves input tokens.
+        self._instruction_models: Dict[str, genai.GenerativeModel] = {}
+        self._lock = threading.Lock()
+        self.usage = LLMUsageTracker()
+
+    def _model_for(self, system_instruction: str) -> genai.GenerativeModel:
+        """Returns the reusable model for a system instruction."""
+        model = self._instruction_models.get(system_instruction)
+        if model is not None:
+            return model
+
+        # Built outside the lock so concurrent requests never wait on it; if two race, the first one stored wins
+        model = genai.GenerativeModel(settings.LLM_MODEL, system_instruction=system_instruction)
+        with self._lock:
+            return self._instruction_models.setdefault(system_instruction, model)
+
+    def generate_response(self, prompt: str, system_instruction: Optional[str] = None) -> str:
         """
         Generates a response from the LLM based on a given prompt.
 
         Args:
-            prompt (str): The complete prompt to send to the model.
+            prompt (str): The variable part of the prompt to send to the model.
+            system_instruction (str, optional): Static instructions, sent through the model's
+                system-instruction slot instead of being repeated in the prompt.
 
         Returns:
             str: The text content of the generated response.
         """
+        model, system_instruction_bytes = self.model, 0
+        if system_instruction:
+            model = self._model_for(system_instruction)
+            system_instruction_bytes = len(system_instruction.encode("utf-8"))
+
         try:
             #logger.debug(f"Sending prompt to LLM: {prompt[:200]}...") # Log a snippet of the prompt
-            response = self.model.generate_content(prompt, generation_config={"temperature": 0.1})
+            response = model.generate_content(prompt, generation_config={"temperature": 0.1})
+
+            usage_metadata = getattr(response, "usage_metadata", None)
+            self.usage.record(
+                prompt_bytes=len(prompt.encode("utf-8")),
+                system_instruction_bytes=system_instruction_bytes,
+                prompt_tokens=getattr(usage_metadata, "prompt_token_count", 0) or 0,
+                cached_tokens=getattr(usage_metadata, "cached_content_token_count", 0) or 0,
+            )
+
             if response.text:
                 # logger.debug(f"Received response from LLM: {response.text[:200]}...")
                 return response.text
@@ -40,8 +112,8 @@ class LLMClient:
         except Exception as e:
             logger.error(f"An error occurred while calling the LLM API: {e}")
             return "An error occurred while trying to process your request. Please try again later."
-        
+
 
 # Example usage:
 # llm_client = LLMClient()
-# response = llm_client.generate_response("What is the capital of France?")
\ No newline at end of file
+# response = llm_client.generate_response("What is the capital of France?")
@@ -1,6 +1,7 @@
 import os
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pathlib import Path
+from typing import Literal
 
 # Define the base directory of the project
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -30,6 +31,27 @@ class Settings(BaseSettings):
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
     LLM_MODEL: str = "gemini-2.5-flash-lite"
 
+    # --- Retrieval Configuration ---
+    # "table" indexes one document per table; "row" indexes one document per metric row
+    # (or cap table instrument group) and reassembles matched rows under their parent table.
+    CHUNKING_MODE: Literal["table", "row"] = "table"
+    RETRIEVAL_K: int = 10
+
+    # --- Sharding Configuration ---
+    # With NUM_SHARDS > 1, documents are partitioned by company_id hash and searched scatter-gather.
+    # "process" serves each shard from a local worker process; "http" calls the shard servers in SHARD_URLS.
+    NUM_SHARDS: int = 1
+    SHARD_BACKEND: Literal["process", "http"] = "process"
+    SHARD_URLS: list[str] = []
+    # The timeout includes time spent queued behind other searches on the shard. A search that times out
+    # keeps running, so a shard with SHARD_MAX_IN_FLIGHT unfinished searches is skipped until it catches up.
+    SHARD_TIMEOUT_S: float = 2.0
+    SHARD_MAX_IN_FLIGHT: int = 8
+    # Worker processes per shard with the "process" backend; each holds its own copy of the shard's index
+    SHARD_WORKERS: int = 2
+    # Which shard a shard server (src.retriever.shard_server) owns
+    SHARD_ID: int = 0
+
 # Instantiate the settings so we can import it elsewhere
 settings = Settings()
 
@@ -1,3 +1,4 @@
+from functools import cached_property
 from pydantic import BaseModel
 from typing import Optional, List
 
@@ -8,7 +9,12 @@ class TableMetadata(BaseModel):
     keywords: list[str]
     source_url: str
     currency: Optional[str] = None
-    
+    # --- Row-level chunking (CHUNKING_MODE="row") ---
+    parent_id: Optional[str] = None      # "<company_id>/<table_name>" of the table this chunk was cut from
+    parent_title: Optional[str] = None   # Heading of the parent table, emitted once when chunks are reassembled
+    chunk_label: Optional[str] = None    # Metric name or cap table instrument group
+    row_index: Optional[int] = None      # Position of the chunk within its parent table
+
 
 class Document(BaseModel):
     """
@@ -19,6 +25,18 @@ class Document(BaseModel):
     content: str      # The natural language text to be embedded
     metadata: TableMetadata
 
+    @cached_property
+    def prompt_block(self) -> str:
+        """The document as rendered into the LLM context. Rendered once per document and reused across requests."""
+        return f"Source URL: {self.metadata.source_url}\n\n{self.content}"
+
+    @cached_property
+    def prompt_body(self) -> str:
+        """The content without its parent table heading, which row-level chunks repeat for embedding."""
+        if self.metadata.parent_title is None:
+            return self.content
+        return self.content.removeprefix(f"{self.metadata.parent_title}\n")
+
 # --- API Schemas ---
 class ChatRequest(BaseModel):
     """
@@ -34,4 +52,27 @@ class ChatResponse(BaseModel):
     """
     response: str
     conversation_id: str
-    retrieved_context: Optional[List[str]] = None
\ No newline at end of file
+    retrieved_context: Optional[List[str]] = None
+
+# --- Shard Server Schemas ---
+class ShardSearchRequest(BaseModel):
+    """
+    A search forwarded by the sharded retriever coordinator. The query is encoded once by the coordinator.
+    """
+    embedding: List[float]
+    k: int
+    company_filter: Optional[str] = None
+    table_filter: Optional[str] = None
+
+class ScoredDocument(BaseModel):
+    """
+    A retrieved document with its L2 distance to the query, used to merge results across shards.
+    """
+    distance: float
+    document: Document
+
+class ShardSearchResponse(BaseModel):
+    """
+    The top-k documents of a single shard.
+    """
+    results: List[ScoredDocument]
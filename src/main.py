@@ -4,12 +4,14 @@ from loguru import logger
 from .common.schema import ChatRequest, ChatResponse
 from .common.session_manager import SessionManager
 from .retriever.retriever import Retriever
+from .retriever.sharded_retriever import ShardedRetriever
+from .common.config import settings
 from .agents.llm_client import LLMClient
 from .agents.agent import Agent
 
 logger.info("Starting application setup...")
 try:
-    retriever = Retriever()
+    retriever = ShardedRetriever() if settings.NUM_SHARDS > 1 else Retriever()
     llm_client = LLMClient()
     agent = Agent(retriever=retriever, llm_client=llm_client)
     session_manager = SessionManager()
@@ -70,6 +72,13 @@ def handle_chat(request: ChatRequest):
         logger.error(f"An error occurred in the chat endpoint: {e}")
         raise HTTPException(status_code=500, detail="An internal error occurred.")
 
+@app.get("/metrics", status_code=200)
+def llm_metrics():
+    """
+    Reports how much is sent to the LLM per request, to confirm the savings of prompt caching.
+    """
+    return llm_client.usage.snapshot()
+
 @app.get("/health", status_code=200)
 def health_check():
     """
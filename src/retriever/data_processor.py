@@ -1,4 +1,62 @@
-def process_cap_table(company_info: dict, table_name: str, table_data: dict, table_title: str) -> tuple[str, dict]:
+CAP_TABLE_HEADERS = "| Instrument Name | Security | Maturity | Rate | Amount (USDm) |\n|---|---|---|---|---|"
+
+
+def _format_cap_table_row(row: dict) -> str:
+    """Renders a single capitalization table row as a Markdown table line."""
+    instrument_name = row.get("name", "N/A")
+    amount_val = row.get('amount_usdm')
+
+    # Default display for amount, handling None values gracefully
+    amount_display = str(amount_val) if amount_val is not None else ""
+
+    # Emphasize subtotals with bold formatting
+    if row.get("subtotal"):
+        instrument_name = f"**{instrument_name}**"
+        amount_display = f"**{amount_display}**"
+
+    # Use .get with a default of '' to avoid printing 'None' for empty cells
+    security = row.get('security', '')
+    maturity = row.get('maturity', '')
+    rate = row.get('rate', '')
+
+    return f"| {instrument_name} | {security} | {maturity} | {rate} | {amount_display} |"
+
+
+def _format_metric_row(row: dict, periods: list[dict]) -> list[str]:
+    """Renders a single financial metric row as a Markdown bullet with one sub-bullet per period."""
+    metric = row.get("metric", "N/A")
+    unit = row.get("unit", "")
+    values = row.get("values", [])
+
+    lines = [f"- **{metric}**:"]
+    for i, value in enumerate(values):
+        if i < len(periods):
+            period_info = periods[i]
+            period_str = f"{period_info.get('period')} ({period_info.get('date')})"
+            value_str = f"{value} {unit}"
+            lines.append(f"  - {period_str}: {value_str}")
+    return lines
+
+
+def _group_cap_table_rows(rows: list[dict]) -> list[list[dict]]:
+    """
+    Splits cap table rows into instrument groups. A group is a run of instruments closed by
+    one or more consecutive subtotal rows (e.g. the secured facilities followed by
+    'Gross Secured Debt' and 'Net Secured Debt'). Trailing rows without a subtotal form a final group.
+    """
+    groups, current = [], []
+    for i, row in enumerate(rows):
+        current.append(row)
+        next_is_subtotal = i + 1 < len(rows) and rows[i + 1].get("subtotal")
+        if row.get("subtotal") and not next_is_subtotal:
+            groups.append(current)
+            current = []
+    if current:
+        groups.append(current)
+    return groups
+
+
+def process_cap_table(company_info: dict, table_name: str, table_data: dict, table_title: dict) -> tuple[str, dict]:
     """
     Processes the capitalization table into a clean Markdown table format.
     
@@ -6,7 +64,7 @@ def process_cap_table(company_info: dict, table_name: str, table_data: dict, tab
         company_info (dict): Information about the company.
         table_data (dict): The data for the capitalization table.
         table_name (str): The name of the capitalization table.
-        table_title (str): The human-readable title for the table.
+        table_title (dict): The human-readable title for the table.
 
     Returns:
         tuple[str, dict]: The processed content and metadata.
@@ -18,32 +76,15 @@ def process_cap_table(company_info: dict, table_name: str, table_data: dict, tab
     
     # --- Generate Content ---
     content_parts = [
-        f"## {table_title} for {company_name} (as of {as_of_date})",
+        f"## {table_title.get('title', table_name)} for {company_name} (as of {as_of_date})",
         f"This document contains the capitalization table for {company_name}, detailing its debt structure.",
     ]
     
     # Create Markdown table headers
-    headers = "| Instrument Name | Security | Maturity | Rate | Amount (USDm) |\n|---|---|---|---|---|"
-    md_rows = [headers]
+    md_rows = [CAP_TABLE_HEADERS]
     
     for row in table_data.get("rows", []):
-        instrument_name = row.get("name", "N/A")
-        amount_val = row.get('amount_usdm')
-        
-        # Default display for amount, handling None values gracefully
-        amount_display = str(amount_val) if amount_val is not None else ""
-
-        # Emphasize subtotals with bold formatting
-        if row.get("subtotal"):
-            instrument_name = f"**{instrument_name}**"
-            amount_display = f"**{amount_display}**"
-        
-        # Use .get with a default of '' to avoid printing 'None' for empty cells
-        security = row.get('security', '')
-        maturity = row.get('maturity', '')
-        rate = row.get('rate', '')
-
-        md_rows.append(f"| {instrument_name} | {security} | {maturity} | {rate} | {amount_display} |")
+        md_rows.append(_format_cap_table_row(row))
 
     content_parts.append("\n".join(md_rows))
     content = "\n\n".join(content_parts)
@@ -61,7 +102,7 @@ def process_cap_table(company_info: dict, table_name: str, table_data: dict, tab
     return content, metadata
 
 
-def process_financial_table(company_info: dict, table_name: str, table_data: dict, table_title: str) -> tuple[str, dict]:
+def process_financial_table(company_info: dict, table_name: str, table_data: dict, table_title: dict) -> tuple[str, dict]:
     """
     Processes financial tables like 'key_financials' and 'cash_flow_and_leverage'.
     
@@ -69,7 +110,7 @@ def process_financial_table(company_info: dict, table_name: str, table_data: dic
         company_info (dict): Information about the company.
         table_data (dict): The data for the financial table.
         table_name (str): The name of the financial table.
-        table_meta (dict): Metadata for the financial table.
+        table_title (dict): The human-readable title for the table.
 
     Returns:
         tuple[str, dict]: The processed content and metadata.
@@ -82,24 +123,13 @@ def process_financial_table(company_info: dict, table_name: str, table_data: dic
     
     # --- Generate Content ---
     content_parts = [
-        f"## {table_title} for {company_name} (Currency: {currency})",
+        f"## {table_title.get('title', table_name)} for {company_name} (Currency: {currency})",
         f"This document contains data on: {', '.join(keywords)}.",
         "\n### Data"
     ]
     
     for row in table_data.get("rows", []):
-        metric = row.get("metric", "N/A")
-        unit = row.get("unit", "")
-        values = row.get("values", [])
-        
-        content_parts.append(f"- **{metric}**:")
-        
-        for i, value in enumerate(values):
-            if i < len(periods):
-                period_info = periods[i]
-                period_str = f"{period_info.get('period')} ({period_info.get('date')})"
-                value_str = f"{value} {unit}"
-                content_parts.append(f"  - {period_str}: {value_str}")
+        content_parts.extend(_format_metric_row(row, periods))
 
     content = "\n".join(content_parts)
     metadata = {
@@ -110,4 +140,86 @@ def process_financial_table(company_info: dict, table_name: str, table_data: dic
         "source_url": f"www.9fin.com{table_data.get('url', '')}",
         "currency": currency
     }
-    return content, metadata
\ No newline at end of file
+    return content, metadata
+
+
+def process_cap_table_groups(company_info: dict, table_name: str, table_data: dict, table_title: dict) -> list[tuple[str, dict]]:
+    """
+    Processes the capitalization table into one chunk per instrument group, so that a question
+    about e.g. secured debt only pulls the secured facilities and their subtotals into the prompt.
+
+    Args:
+        company_info (dict): Information about the company.
+        table_name (str): The name of the capitalization table.
+        table_data (dict): The data for the capitalization table.
+        table_title (dict): The human-readable title for the table.
+
+    Returns:
+        list[tuple[str, dict]]: The processed content and metadata of each instrument group.
+    """
+    company_name = company_info['name']
+    as_of_date = table_data.get("as_of", "N/A")
+    parent_title = f"## {table_title.get('title', table_name)} for {company_name} (as of {as_of_date})"
+
+    chunks = []
+    for row_index, group in enumerate(_group_cap_table_rows(table_data.get("rows", []))):
+        subtotals = [row.get("name", "N/A") for row in group if row.get("subtotal")]
+        label = " / ".join(subtotals) if subtotals else "Other instruments"
+
+        md_rows = [CAP_TABLE_HEADERS] + [_format_cap_table_row(row) for row in group]
+        content = "\n".join([parent_title, f"### {label}", "\n".join(md_rows)])
+
+        metadata = {
+            "company_name": company_name,
+            "company_id": company_info['id'],
+            "table_name": table_name,
+            "keywords": [row.get("name", "") for row in group if row.get("name")],
+            "source_url": f"www.9fin.com{table_data.get('url', '')}",
+            "parent_id": f"{company_info['id']}/{table_name}",
+            "parent_title": parent_title,
+            "chunk_label": label,
+            "row_index": row_index,
+        }
+        chunks.append((content, metadata))
+    return chunks
+
+
+def process_financial_table_rows(company_info: dict, table_name: str, table_data: dict, table_title: dict) -> list[tuple[str, dict]]:
+    """
+    Processes financial tables like 'key_financials' and 'cash_flow_and_leverage' into one chunk per metric row.
+
+    Args:
+        company_info (dict): Information about the company.
+        table_name (str): The name of the financial table.
+        table_data (dict): The data for the financial table.
+        table_title (dict): The human-readable title for the table.
+
+    Returns:
+        list[tuple[str, dict]]: The processed content and metadata of each metric row.
+    """
+    company_name = company_info['name']
+    currency = company_info['currency']
+    periods = company_info['periods']
+    parent_title = f"## {table_title.get('title', table_name)} for {company_name} (Currency: {currency})"
+
+    chunks = []
+    for row_index, row in enumerate(table_data.get("rows", [])):
+        metric = row.get("metric")
+        if not metric:
+            continue
+
+        content = "\n".join([parent_title] + _format_metric_row(row, periods))
+        metadata = {
+            "company_name": company_name,
+            "company_id": company_info['id'],
+            "table_name": table_name,
+            "keywords": [metric],
+            "source_url": f"www.9fin.com{table_data.get('url', '')}",
+            "currency": currency,
+            "parent_id": f"{company_info['id']}/{table_name}",
+            "parent_title": parent_title,
+            "chunk_label": metric,
+            "row_index": row_index,
+        }
+        chunks.append((content, metadata))
+    return chunks
@@ -1,18 +1,72 @@
+import os
 import json
+import zlib
 import faiss
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from loguru import logger
 from collections import defaultdict
 
 from src.common.config import settings
-from src.retriever.data_processor import process_financial_table, process_cap_table
+from src.retriever.data_processor import (
+    process_financial_table,
+    process_cap_table,
+    process_financial_table_rows,
+    process_cap_table_groups,
+)
 from src.common.schema import Document, TableMetadata
 
+# Bump whenever the rendered document content or doc_id scheme changes, so stale checkpoints are rebuilt
+CHECKPOINT_FORMAT_VERSION = 2
+
+# doc_ids are derived from (company_id, table, chunk index), so every shard assigns the same IDs
+# without parsing the other shards' companies
+TABLE_ID_SLOTS = {"key_financials": 0, "cash_flow_and_leverage": 1, "cap_table": 2}
+MAX_CHUNKS_PER_TABLE = 1_000
+
+
+def shard_for_company(company_id: int, num_shards: int) -> int:
+    """Maps a company to its shard with a hash that is stable across processes and machines."""
+    return zlib.crc32(str(company_id).encode("utf-8")) % num_shards
+
+
+def make_doc_id(company_id: int, table_name: str, chunk_index: int) -> int:
+    """Returns the globally unique, deterministic doc_id of a table chunk."""
+    if chunk_index >= MAX_CHUNKS_PER_TABLE:
+        raise ValueError(f"Table '{table_name}' of company {company_id} has more than {MAX_CHUNKS_PER_TABLE} chunks.")
+    return (int(company_id) * len(TABLE_ID_SLOTS) + TABLE_ID_SLOTS[table_name]) * MAX_CHUNKS_PER_TABLE + chunk_index
+
+
 class Retriever:
-    def __init__(self, embedding_model_name: str = settings.EMBEDDING_MODEL):
-        self.embedding_model = SentenceTransformer(embedding_model_name)
+    def __init__(
+        self,
+        embedding_model_name: str = settings.EMBEDDING_MODEL,
+        chunking_mode: str = settings.CHUNKING_MODE,
+        auto_load: bool = True,
+        shard: Optional[Tuple[int, int]] = None,
+    ):
+        """
+        Args:
+            embedding_model_name (str): The sentence-transformers model used for documents and queries.
+            chunking_mode (str): "table" or "row", see `settings.CHUNKING_MODE`.
+            auto_load (bool): Load or build the index on construction. Benchmarks disable this to time each stage.
+            shard (tuple[int, int], optional): (shard_id, num_shards). Only companies hashed to this shard are
+                indexed, and checkpoints are kept in a per-shard directory.
+        """
+        self.embedding_model_name = embedding_model_name
+        self._embedding_model = None
+        self.chunking_mode = chunking_mode
+        self.shard = shard
+
+        # Checkpoint locations; each shard keeps its own metadata and FAISS index
+        if shard is None:
+            self.metadata_path = settings.METADATA_PATH
+            self.faiss_index_path = settings.FAISS_INDEX_PATH
+        else:
+            shard_dir = settings.CHECKPOINT_DIR / f"shard_{shard[0]}_of_{shard[1]}"
+            os.makedirs(shard_dir, exist_ok=True)
+            self.metadata_path = shard_dir / settings.METADATA_PATH.name
+            self.faiss_index_path = shard_dir / settings.FAISS_INDEX_PATH.name
         self.documents: Dict[int, Document] = {}
 
         # Inverted index store for fast filtering
@@ -23,12 +77,23 @@ class Retriever:
         self.faiss_index: faiss.Index = None
 
         # Load or build the index
-        if settings.METADATA_PATH.exists() and settings.FAISS_INDEX_PATH.exists():
-            logger.info("Loading index from checkpoints...")
-            self._load_from_checkpoints()
-        else:
-            logger.info("No checkpoints found. Building index from source data...")
-            self._build_from_scratch()
+        if not auto_load:
+            return
+        if self.metadata_path.exists() and self.faiss_index_path.exists() and self._load_from_checkpoints():
+            return
+        logger.info("No usable checkpoints found. Building index from source data...")
+        self._build_from_scratch()
+
+    @property
+    def embedding_model(self):
+        """
+        The sentence-transformers model, loaded on first use. Shards that load from a checkpoint only search
+        by the coordinator's query embedding, so they never import torch or hold the model.
+        """
+        if self._embedding_model is None:
+            from sentence_transformers import SentenceTransformer
+            self._embedding_model = SentenceTransformer(self.embedding_model_name)
+        return self._embedding_model
 
     def _build_from_scratch(self):
         """Builds the entire index from the raw JSON data."""
@@ -61,8 +126,6 @@ class Retriever:
         if not company_financials:
             raise ValueError("Source data does not contain 'company_financials' key.")
         
-        doc_id_counter = 0
-        
         TABLE_TITLE_MAP = {
             "key_financials": {"title": "Key Financials"},
             "cash_flow_and_leverage": {"title": "Cash Flow and Leverage"},
@@ -75,6 +138,13 @@ class Retriever:
             "cap_table": process_cap_table
         }
 
+        # Row mode emits several (content, metadata) chunks per table
+        ROW_PROCESSOR_MAP = {
+            "key_financials": process_financial_table_rows,
+            "cash_flow_and_leverage": process_financial_table_rows,
+            "cap_table": process_cap_table_groups
+        }
+
         for company in company_financials:
             company_info = {
                 "name": company.get("company"),
@@ -87,36 +157,46 @@ class Retriever:
                 logger.warning(f"Skipping company with missing name or ID: {company_info}")
                 continue
 
+            if self.shard is not None and shard_for_company(company_info['id'], self.shard[1]) != self.shard[0]:
+                continue
+
             logger.debug(f"Processing company: {company_info['name']} (ID: {company_info['id']})")
             
             for table_name, table_data in company.items():
                 if table_name in TABLE_PROCESSOR_MAP:
-                    processor_func = TABLE_PROCESSOR_MAP[table_name]
                     table_title = TABLE_TITLE_MAP[table_name]
-                    
-                    # Call the specialized processor
-                    content, metadata = processor_func(company_info, table_name, table_data, table_title)
-                    
-                    # --- Assemble the final Document object ---
-                    tableMetadata = TableMetadata(**metadata)
-
-                    doc = Document(
-                        doc_id=doc_id_counter,
-                        content=content,
-                        metadata=tableMetadata
-                    )
-                    self.documents[doc_id_counter] = doc
-                    self.company_index[company_info['name']].append(doc_id_counter)
-                    self.table_index[table_name].append(doc_id_counter)
-
-                    doc_id_counter += 1
 
+                    # Call the specialized processor
+                    if self.chunking_mode == "row":
+                        chunks = ROW_PROCESSOR_MAP[table_name](company_info, table_name, table_data, table_title)
+                    else:
+                        chunks = [TABLE_PROCESSOR_MAP[table_name](company_info, table_name, table_data, table_title)]
+
+                    for chunk_index, (content, metadata) in enumerate(chunks):
+                        doc_id = make_doc_id(company_info['id'], table_name, chunk_index)
+
+                        # --- Assemble the final Document object ---
+                        tableMetadata = TableMetadata(**metadata)
+
+                        doc = Document(
+                            doc_id=doc_id,
+                            content=content,
+                            metadata=tableMetadata
+                        )
+                        self.documents[doc_id] = doc
+                        self.company_index[company_info['name']].append(doc_id)
+                        self.table_index[table_name].append(doc_id)
+
+        self._render_prompt_blocks()
         logger.info(f"Processed a total of {len(self.documents)} documents from {len(company_financials)} companies.")
 
     def _create_embeddings(self) -> np.ndarray:
         """Generates embeddings for all documents' content."""
         contents = [doc.content for doc in self.documents.values()]
         logger.info(f"Generating embeddings for {len(contents)} documents...")
+        if not contents:
+            # A shard can own no companies when there are more shards than companies
+            return np.empty((0, self.embedding_model.get_sentence_embedding_dimension()), dtype='float32')
         logger.debug(f"Sample content for embedding: {contents[0][:100]}...")
 
         return self.embedding_model.encode(contents, batch_size=32, show_progress_bar=True, convert_to_numpy=True)
@@ -136,36 +216,75 @@ class Retriever:
 
     def _save_checkpoints(self):
         """Saves the metadata and FAISS index to disk."""
-        logger.info(f"Saving checkpoints to {settings.CHECKPOINT_DIR}...")
+        logger.info(f"Saving checkpoints to {self.metadata_path.parent}...")
         
         # Save metadata
         checkpoint_data = {
+            "format_version": CHECKPOINT_FORMAT_VERSION,
+            "chunking_mode": self.chunking_mode,
             "documents": [doc.model_dump() for doc in self.documents.values()],
             "company_index": self.company_index,
             "table_index": self.table_index
         }
-        with open(settings.METADATA_PATH, 'w') as f:
+        with open(self.metadata_path, 'w') as f:
             json.dump(checkpoint_data, f, indent=2)
 
         # Save FAISS index
-        faiss.write_index(self.faiss_index, str(settings.FAISS_INDEX_PATH))
+        faiss.write_index(self.faiss_index, str(self.faiss_index_path))
 
         logger.success("Checkpoints saved successfully.")
 
-    def _load_from_checkpoints(self):
-        """Loads metadata and FAISS index from disk."""
+    def _render_prompt_blocks(self):
+        """Renders every document's LLM context block once at index load, so requests only join cached strings."""
+        for doc in self.documents.values():
+            _ = doc.prompt_block
+            if self.chunking_mode == "row":
+                _ = doc.prompt_body
+
+    def _load_from_checkpoints(self) -> bool:
+        """
+        Loads metadata and FAISS index from disk. Returns False, leaving the retriever empty, if the
+        checkpoint was built with another chunking mode or document format and must be rebuilt.
+        """
         logger.info("Loading index from checkpoints...")
-    
-        self.faiss_index = faiss.read_index(str(settings.FAISS_INDEX_PATH))
 
-        with open(settings.METADATA_PATH, 'r') as f:
+        with open(self.metadata_path, 'r') as f:
             checkpoint_data = json.load(f)
 
+        checkpoint_version = checkpoint_data.get("format_version", 1)
+        if checkpoint_version != CHECKPOINT_FORMAT_VERSION:
+            logger.warning(f"Checkpoint has format version {checkpoint_version}, expected {CHECKPOINT_FORMAT_VERSION}.")
+            return False
+
+        checkpoint_mode = checkpoint_data.get("chunking_mode", "table")
+        if checkpoint_mode != self.chunking_mode:
+            logger.warning(f"Checkpoint was built with chunking mode '{checkpoint_mode}' but '{self.chunking_mode}' is configured.")
+            return False
+
+        self.faiss_index = faiss.read_index(str(self.faiss_index_path))
+
         self.documents = {doc_data['doc_id']: Document(**doc_data) for doc_data in checkpoint_data['documents']}
         self.company_index = checkpoint_data['company_index']
         self.table_index = checkpoint_data['table_index']
-        
+        self._render_prompt_blocks()
+
         logger.success(f"Successfully loaded {len(self.documents)} documents and indices from checkpoints.")
+        return True
+
+    def _search_params(self, id_selector: faiss.IDSelector) -> faiss.SearchParameters:
+        """
+        Builds filtered-search parameters of the type the underlying index expects;
+        FAISS rejects e.g. IVF parameters on an HNSW index.
+        """
+        base_index = self.faiss_index
+        if isinstance(base_index, faiss.IndexIDMap):
+            base_index = faiss.downcast_index(base_index.index)
+
+        if isinstance(base_index, faiss.IndexHNSW):
+            return faiss.SearchParametersHNSW(sel=id_selector, efSearch=base_index.hnsw.efSearch)
+        if isinstance(base_index, faiss.IndexIVF):
+            return faiss.SearchParametersIVF(sel=id_selector, nprobe=base_index.nprobe)
+        return faiss.SearchParameters(sel=id_selector)
 
     def search(self, query: str, k: int = 5, company_filter: Optional[str] = None, table_filter: Optional[str] = None) -> List[Document]:
         """
@@ -173,6 +292,13 @@ class Retriever:
         """
 
         query_embedding = self.embedding_model.encode([query])
+        return [doc for _, doc in self.search_by_embedding(query_embedding, k, company_filter, table_filter)]
+
+    def search_by_embedding(self, query_embedding: np.ndarray, k: int = 5, company_filter: Optional[str] = None, table_filter: Optional[str] = None) -> List[Tuple[float, Document]]:
+        """
+        Runs the hybrid search for an already-encoded query and returns (L2 distance, document) pairs.
+        The sharded coordinator encodes the query once and merges shard results by distance.
+        """
         selected_ids = set()
 
         if company_filter and company_filter in self.company_index:
@@ -192,7 +318,7 @@ class Retriever:
             distances, indices = self.faiss_index.search(
                 query_embedding,
                 k,
-                params=faiss.SearchParametersIVF(sel=id_selector)
+                params=self._search_params(id_selector)
             )
         else:
             logger.debug("No filters applied; searching across all documents.")
@@ -203,7 +329,42 @@ class Retriever:
 
         results = []
         if len(indices) > 0:
-            for doc_id in indices[0]:
+            for distance, doc_id in zip(distances[0], indices[0]):
                 if doc_id != -1: # FAISS returns -1 for no result
-                    results.append(self.documents[doc_id])
+                    results.append((float(distance), self.documents[doc_id]))
         return results
+
+    @staticmethod
+    def reassemble(documents: List[Document]) -> List[Document]:
+        """
+        Merges row-level chunks back into one document per parent table, keeping only the matched rows.
+
+        Parents are ordered by their best-ranked chunk and rows by their position in the original table,
+        so the prompt reads like a trimmed version of the full table. Table-level documents pass through unchanged.
+        """
+        grouped: Dict[str, List[Document]] = {}
+        for doc in documents:
+            key = doc.metadata.parent_id or f"doc/{doc.doc_id}"
+            grouped.setdefault(key, []).append(doc)
+
+        merged = []
+        for chunks in grouped.values():
+            first = chunks[0]
+            if first.metadata.parent_id is None:
+                merged.append(first)
+                continue
+
+            chunks.sort(key=lambda d: d.metadata.row_index or 0)
+            parent_title = first.metadata.parent_title
+            merged.append(Document(
+                doc_id=first.doc_id,
+                content="\n".join([parent_title] + [doc.prompt_body for doc in chunks]),
+                metadata=first.metadata.model_copy(update={
+                    "keywords": [kw for doc in chunks for kw in doc.metadata.keywords],
+                    "chunk_label": ", ".join(doc.metadata.chunk_label for doc in chunks),
+                    "row_index": None,
+                })
+            ))
+
+        logger.debug(f"Reassembled {len(documents)} retrieved chunks into {len(merged)} context documents.")
+        return merged
@@ -0,0 +1,52 @@
+import numpy as np
+from fastapi import FastAPI, HTTPException
+from loguru import logger
+
+from src.common.config import settings
+from src.common.schema import ScoredDocument, ShardSearchRequest, ShardSearchResponse
+from src.retriever.retriever import Retriever
+
+logger.info(f"Starting shard server {settings.SHARD_ID} of {settings.NUM_SHARDS}...")
+try:
+    retriever = Retriever(shard=(settings.SHARD_ID, settings.NUM_SHARDS))
+
+    app = FastAPI(
+        title=f"9fin Retriever Shard {settings.SHARD_ID}",
+        description="Serves vector search over one company_id-hash partition of the financial documents.",
+        version="1.0.0"
+    )
+    logger.success(f"Shard {settings.SHARD_ID} ready with {len(retriever.documents)} documents.")
+
+except Exception as e:
+    logger.critical(f"Failed to initialize shard {settings.SHARD_ID}: {e}")
+    raise
+
+# --- API Endpoints ---
+
+@app.post("/search", response_model=ShardSearchResponse, status_code=200)
+def handle_search(request: ShardSearchRequest):
+    """
+    Searches this shard with a query embedding computed by the coordinator.
+    """
+    try:
+        query_embedding = np.array([request.embedding], dtype='float32')
+        results = retriever.search_by_embedding(query_embedding, request.k, request.company_filter, request.table_filter)
+        return ShardSearchResponse(results=[ScoredDocument(distance=distance, document=doc) for distance, doc in results])
+
+    except Exception as e:
+        logger.error(f"An error occurred in the shard search endpoint: {e}")
+        raise HTTPException(status_code=500, detail="An internal error occurred.")
+
+@app.get("/companies", response_model=list[str], status_code=200)
+def list_companies():
+    """
+    Lists the companies owned by this shard, so the coordinator can route company-filtered queries.
+    """
+    return list(retriever.company_index.keys())
+
+@app.get("/health", status_code=200)
+def health_check():
+    """
+    A simple health check endpoint to confirm the shard is serving.
+    """
+    return {"status": "ok", "shard_id": settings.SHARD_ID, "documents": len(retriever.documents)}
@@ -0,0 +1,225 @@
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Optional, Tuple
+
+import httpx
+import numpy as np
+from loguru import logger
+
+from src.common.config import settings
+from src.common.schema import Document, ShardSearchRequest, ShardSearchResponse
+from src.retriever.retriever import Retriever
+
+# --- Shard worker process state ---
+# Each worker process serves exactly one shard, loaded once by the pool initializer.
+_shard_retriever: Optional[Retriever] = None
+
+
+def _init_shard_worker(shard_id: int, num_shards: int):
+    """Loads (or builds) this worker's shard checkpoint once, when the worker process starts."""
+    global _shard_retriever
+    _shard_retriever = Retriever(shard=(shard_id, num_shards))
+
+
+def _shard_worker_search(query_embedding: np.ndarray, k: int, company_filter: Optional[str], table_filter: Optional[str]) -> List[Tuple[float, Document]]:
+    return _shard_retriever.search_by_embedding(query_embedding, k, company_filter, table_filter)
+
+
+def _shard_worker_companies() -> List[str]:
+    return list(_shard_retriever.company_index.keys())
+
+
+class ShardClient:
+    """
+    Base for shard clients. Counts searches that have not finished yet, including ones the coordinator
+    already gave up on: a running search cannot be cancelled, so those still occupy the shard.
+    """
+    def __init__(self, shard_id: int):
+        self.shard_id = shard_id
+        self.in_flight = 0
+        self._in_flight_lock = threading.Lock()
+
+    def _track(self, future: Future) -> Future:
+        with self._in_flight_lock:
+            self.in_flight += 1
+        future.add_done_callback(self._untrack)
+        return future
+
+    def _untrack(self, future: Future):
+        with self._in_flight_lock:
+            self.in_flight -= 1
+
+    @property
+    def overloaded(self) -> bool:
+        return self.in_flight >= settings.SHARD_MAX_IN_FLIGHT
+
+
+class ProcessShardClient(ShardClient):
+    """
+    Serves one shard from a pool of `SHARD_WORKERS` local worker processes.
+    """
+    def __init__(self, shard_id: int, num_shards: int, num_workers: int = settings.SHARD_WORKERS):
+        super().__init__(shard_id)
+        self.num_shards = num_shards
+        self.num_workers = num_workers
+        self._executor_lock = threading.Lock()
+        self.executor = self._create_executor()
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        # "spawn" avoids forking a parent that already holds FAISS/torch thread pools
+        return ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_shard_worker,
+            initargs=(self.shard_id, self.num_shards),
+        )
+
+    def _submit(self, fn, *args) -> Future:
+        """Submits to the worker pool, restarting it once if a worker died and broke the pool."""
+        executor = self.executor
+        try:
+            return executor.submit(fn, *args)
+        except BrokenProcessPool:
+            with self._executor_lock:
+                # Another thread may already have replaced the broken pool
+                if self.executor is executor:
+                    logger.warning(f"Shard {self.shard_id} worker pool is broken; restarting it.")
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    self.executor = self._create_executor()
+            return self.executor.submit(fn, *args)
+
+    def submit_companies(self) -> Future:
+        return self._submit(_shard_worker_companies)
+
+    def submit_search(self, query_embedding: np.ndarray, k: int, company_filter: Optional[str], table_filter: Optional[str]) -> Future:
+        return self._track(self._submit(_shard_worker_search, query_embedding, k, company_filter, table_filter))
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class HttpShardClient(ShardClient):
+    """
+    Calls a shard server (`src.retriever.shard_server`) over a pooled HTTP connection.
+    Each shard gets its own threads, enough for SHARD_MAX_IN_FLIGHT searches, so a slow shard cannot
+    starve the requests to healthy ones.
+    """
+    def __init__(self, shard_id: int, base_url: str):
+        super().__init__(shard_id)
+        self.executor = ThreadPoolExecutor(max_workers=settings.SHARD_MAX_IN_FLIGHT, thread_name_prefix=f"shard_{shard_id}")
+        self.client = httpx.Client(base_url=base_url, timeout=settings.SHARD_TIMEOUT_S)
+
+    def _companies(self) -> List[str]:
+        response = self.client.get("/companies", timeout=None)
+        response.raise_for_status()
+        return response.json()
+
+    def _search(self, request: ShardSearchRequest) -> List[Tuple[float, Document]]:
+        response = self.client.post("/search", json=request.model_dump())
+        response.raise_for_status()
+        return [(scored.distance, scored.document) for scored in ShardSearchResponse(**response.json()).results]
+
+    def submit_companies(self) -> Future:
+        return self.executor.submit(self._companies)
+
+    def submit_search(self, query_embedding: np.ndarray, k: int, company_filter: Optional[str], table_filter: Optional[str]) -> Future:
+        request = ShardSearchRequest(
+            embedding=query_embedding[0].tolist(),
+            k=k,
+            company_filter=company_filter,
+            table_filter=table_filter,
+        )
+        return self._track(self.executor.submit(self._search, request))
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.client.close()
+
+
+class ShardedRetriever:
+    """
+    Scatter-gather coordinator over documents partitioned by company_id hash into independent shards.
+
+    Company-filtered queries go straight to the owning shard; unfiltered queries fan out to every shard
+    in parallel and the per-shard top-k are merged by L2 distance. Shards that fail or miss
+    `SHARD_TIMEOUT_S` (which includes queueing on the shard) are skipped, so a slow shard degrades results
+    instead of failing the request. Shards with `SHARD_MAX_IN_FLIGHT` unfinished searches are not queried
+    at all until they catch up.
+    """
+    def __init__(
+        self,
+        num_shards: int = settings.NUM_SHARDS,
+        backend: str = settings.SHARD_BACKEND,
+        shard_urls: List[str] = settings.SHARD_URLS,
+        embedding_model_name: str = settings.EMBEDDING_MODEL,
+    ):
+        # Queries are encoded once here rather than once per shard, so only the coordinator loads the model.
+        # Imported here so shard worker processes, which import this module, never load torch.
+        from sentence_transformers import SentenceTransformer
+        self.embedding_model = SentenceTransformer(embedding_model_name)
+
+        if backend == "http":
+            if len(shard_urls) != num_shards:
+                raise ValueError(f"SHARD_URLS lists {len(shard_urls)} servers but NUM_SHARDS is {num_shards}.")
+            self.shards = [HttpShardClient(i, url) for i, url in enumerate(shard_urls)]
+        else:
+            self.shards = [ProcessShardClient(i, num_shards) for i in range(num_shards)]
+
+        # Company name -> owning shard, reported by the shards themselves.
+        # Loading or building the shards happens here, in parallel, so no timeout applies.
+        logger.info(f"Waiting for {num_shards} '{backend}' shards to load...")
+        self.company_index: Dict[str, int] = {}
+        for shard, future in [(shard, shard.submit_companies()) for shard in self.shards]:
+            for company in future.result():
+                self.company_index[company] = shard.shard_id
+
+        logger.success(f"Sharded retriever ready with {num_shards} shards and {len(self.company_index)} companies.")
+
+    def search(self, query: str, k: int = 5, company_filter: Optional[str] = None, table_filter: Optional[str] = None) -> List[Document]:
+        """
+        Performs the hybrid search across shards and returns the global top-k documents.
+        """
+        query_embedding = self.embedding_model.encode([query])
+
+        if company_filter in self.company_index:
+            targets = [self.shards[self.company_index[company_filter]]]
+        else:
+            targets = self.shards
+
+        overloaded = [shard.shard_id for shard in targets if shard.overloaded]
+        if overloaded:
+            logger.warning(f"Shards {overloaded} have {settings.SHARD_MAX_IN_FLIGHT}+ searches in flight; skipping them.")
+
+        futures = {
+            shard.submit_search(query_embedding, k, company_filter, table_filter): shard
+            for shard in targets if shard.shard_id not in overloaded
+        }
+        done, not_done = wait(futures, timeout=settings.SHARD_TIMEOUT_S)
+
+        results = []
+        for future in done:
+            try:
+                results.extend(future.result())
+            except Exception as e:
+                logger.error(f"Shard {futures[future].shard_id} failed: {e}")
+
+        if not_done:
+            logger.warning(f"Shards {sorted(futures[f].shard_id for f in not_done)} timed out; returning partial results.")
+            for future in not_done:
+                future.cancel()
+
+        results.sort(key=lambda scored: scored[0])
+        logger.debug(f"Merged {len(results)} results from {len(done)}/{len(targets)} shards.")
+        return [doc for _, doc in results[:k]]
+
+    @staticmethod
+    def reassemble(documents: List[Document]) -> List[Document]:
+        """Merges row-level chunks under their parent tables, exactly as the single-process retriever does."""
+        return Retriever.reassemble(documents)
+
+    def close(self):
+        """Stops the shard worker processes and HTTP connections."""
+        for shard in self.shards:
+            shard.close()
@@ -0,0 +1,60 @@
+import os
+import json
+import zlib
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# The settings object requires an API key at import time; the tests never call Gemini.
+os.environ.setdefault("GEMINI_API_KEY", "test")
+
+DATA_PATH = Path(__file__).resolve().parent.parent / "data" / "financial_data.json"
+
+
+class HashingEncoder:
+    """A tiny deterministic stand-in for SentenceTransformer, so tests need no model download."""
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return 16
+
+    def encode(self, texts, **kwargs) -> np.ndarray:
+        rows = [np.random.default_rng(zlib.crc32(text.encode("utf-8"))).random(16) for text in texts]
+        return np.array(rows, dtype='float32')
+
+
+@pytest.fixture
+def company_financials() -> list[dict]:
+    with open(DATA_PATH, 'r') as f:
+        return json.load(f)["company_financials"]
+
+
+@pytest.fixture
+def company_info(company_financials) -> dict:
+    company = company_financials[0]
+    return {
+        "name": company["company"],
+        "id": company["company_id"],
+        "currency": company["currency"],
+        "periods": company["periods"],
+    }
+
+
+@pytest.fixture
+def make_retriever(monkeypatch, tmp_path):
+    """Builds Retrievers over the real data file with checkpoints in a temporary directory."""
+    from src.common.config import settings
+    from src.retriever import retriever as retriever_module
+
+    # The retriever imports the model class lazily, on first use
+    monkeypatch.setattr("sentence_transformers.SentenceTransformer", HashingEncoder)
+    monkeypatch.setattr(settings, "DATA_PATH", DATA_PATH)
+    monkeypatch.setattr(settings, "CHECKPOINT_DIR", tmp_path)
+    monkeypatch.setattr(settings, "METADATA_PATH", tmp_path / "metadata.json")
+    monkeypatch.setattr(settings, "FAISS_INDEX_PATH", tmp_path / "faiss_index.idx")
+
+    def _make(**kwargs):
+        return retriever_module.Retriever(**kwargs)
+    return _make
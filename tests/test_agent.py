@@ -0,0 +1,72 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.agents import llm_client as llm_client_module
+from src.agents.agent import Agent
+from src.agents.llm_client import LLMClient
+
+
+class RecordingLLM:
+    """Records every call instead of contacting Gemini."""
+    def __init__(self):
+        self.calls = []
+
+    def generate_response(self, prompt, system_instruction=None):
+        self.calls.append((prompt, system_instruction))
+        return "An answer [cite: www.9fin.com/company_id/1/key_financials]."
+
+
+class FakeGenerativeModel:
+    """Stands in for `genai.GenerativeModel`, counting how many models are built."""
+    created = 0
+
+    def __init__(self, model_name, system_instruction=None):
+        FakeGenerativeModel.created += 1
+        self.system_instruction = system_instruction
+
+    def generate_content(self, prompt, generation_config=None):
+        usage = SimpleNamespace(prompt_token_count=120, cached_content_token_count=80)
+        return SimpleNamespace(text="An answer.", usage_metadata=usage)
+
+
+@pytest.fixture
+def fake_gemini(monkeypatch):
+    FakeGenerativeModel.created = 0
+    monkeypatch.setattr(llm_client_module.genai, "GenerativeModel", FakeGenerativeModel)
+    monkeypatch.setattr(llm_client_module.genai, "configure", lambda **kwargs: None)
+    return FakeGenerativeModel
+
+
+def test_answer_prompt_excludes_static_instructions(make_retriever):
+    retriever = make_retriever()
+    llm = RecordingLLM()
+    agent = Agent(retriever=retriever, llm_client=llm)
+    company = agent.known_companies[0]
+
+    _, context_documents = agent.get_response(f"What were {company}'s sales?", f"What were {company}'s sales?")
+
+    [(prompt, system_instruction)] = llm.calls
+    assert system_instruction == Agent.ANSWER_SYSTEM_INSTRUCTION
+    assert "Rules and Constraints" not in prompt
+    assert all(doc.prompt_block in prompt for doc in context_documents)
+
+
+def test_usage_reports_prompt_and_system_instruction_bytes_separately(fake_gemini):
+    client = LLMClient(api_key="test")
+    instruction = Agent.ANSWER_SYSTEM_INSTRUCTION
+
+    client.generate_response("first prompt", system_instruction=instruction)
+    client.generate_response("second prompt!", system_instruction=instruction)
+    client.generate_response("rewrite prompt")
+
+    usage = client.usage.snapshot()
+    instruction_bytes = len(instruction.encode("utf-8"))
+    assert usage["requests"] == 3
+    assert usage["prompt_bytes_per_request"] == pytest.approx((12 + 14 + 14) / 3)
+    assert usage["system_instruction_bytes_per_request"] == pytest.approx(2 * instruction_bytes / 3)
+    assert usage["bytes_sent_total"] == 12 + 14 + 14 + 2 * instruction_bytes
+    assert usage["cached_tokens_per_request"] == 80
+
+    # The default model plus one reused model for the instruction
+    assert fake_gemini.created == 2
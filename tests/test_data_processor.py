@@ -0,0 +1,66 @@
+from src.retriever.data_processor import (
+    _group_cap_table_rows,
+    process_cap_table,
+    process_cap_table_groups,
+    process_financial_table,
+    process_financial_table_rows,
+)
+
+KEY_FINANCIALS_TITLE = {"title": "Key Financials"}
+CAP_TABLE_TITLE = {"title": "Capitalization Table"}
+
+
+def test_group_cap_table_rows_closes_groups_after_consecutive_subtotals(company_financials):
+    rows = company_financials[0]["cap_table"]["rows"]
+    groups = _group_cap_table_rows(rows)
+
+    # Gross/Net Secured Debt are consecutive subtotals and must close a single group
+    assert [[row["name"] for row in group if row.get("subtotal")] for group in groups] == [
+        ["Gross Secured Debt", "Net Secured Debt"],
+        ["Gross Debt"],
+        ["Net Debt"],
+        ["Net Capitalization"],
+    ]
+    # No row is dropped or duplicated
+    assert [row for group in groups for row in group] == rows
+
+
+def test_group_cap_table_rows_keeps_trailing_rows_without_subtotal(company_financials):
+    rows = company_financials[0]["cap_table"]["rows"][:-1]  # Drop the final "Net Capitalization" subtotal
+    groups = _group_cap_table_rows(rows)
+
+    assert [row["name"] for row in groups[-1]] == ["Market Capitalization"]
+    assert [row for group in groups for row in group] == rows
+
+
+def test_process_cap_table_groups_labels_trailing_group(company_info, company_financials):
+    table_data = dict(company_financials[0]["cap_table"])
+    table_data["rows"] = table_data["rows"][:-1]
+
+    chunks = process_cap_table_groups(company_info, "cap_table", table_data, CAP_TABLE_TITLE)
+
+    assert chunks[-1][1]["chunk_label"] == "Other instruments"
+    assert [metadata["row_index"] for _, metadata in chunks] == list(range(len(chunks)))
+
+
+def test_row_chunks_share_parent_linkage_and_source_url(company_info, company_financials):
+    table_data = company_financials[0]["key_financials"]
+    chunks = process_financial_table_rows(company_info, "key_financials", table_data, KEY_FINANCIALS_TITLE)
+
+    assert [metadata["chunk_label"] for _, metadata in chunks] == [row["metric"] for row in table_data["rows"]]
+    for content, metadata in chunks:
+        assert metadata["parent_id"] == "1/key_financials"
+        assert metadata["source_url"] == "www.9fin.com/company_id/1/key_financials"
+        assert content.startswith(metadata["parent_title"] + "\n")
+
+
+def test_table_and_row_modes_emit_the_same_heading(company_info, company_financials):
+    company = company_financials[0]
+
+    table_content, _ = process_financial_table(company_info, "key_financials", company["key_financials"], KEY_FINANCIALS_TITLE)
+    row_chunks = process_financial_table_rows(company_info, "key_financials", company["key_financials"], KEY_FINANCIALS_TITLE)
+    assert table_content.splitlines()[0] == row_chunks[0][1]["parent_title"] == "## Key Financials for Tronox (Currency: USD millions)"
+
+    cap_content, _ = process_cap_table(company_info, "cap_table", company["cap_table"], CAP_TABLE_TITLE)
+    cap_chunks = process_cap_table_groups(company_info, "cap_table", company["cap_table"], CAP_TABLE_TITLE)
+    assert cap_content.splitlines()[0] == cap_chunks[0][1]["parent_title"] == "## Capitalization Table for Tronox (as of 2025-06-30)"
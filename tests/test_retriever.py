@@ -0,0 +1,63 @@
+from src.retriever.retriever import Retriever
+
+
+def _row_retriever(make_retriever) -> Retriever:
+    retriever = make_retriever(chunking_mode="row", auto_load=False)
+    retriever.parse_raw_data()
+    return retriever
+
+
+def _chunk(retriever: Retriever, company_id: int, table_name: str, label: str):
+    return next(
+        doc for doc in retriever.documents.values()
+        if doc.metadata.company_id == company_id and doc.metadata.table_name == table_name and doc.metadata.chunk_label == label
+    )
+
+
+def test_reassemble_orders_parents_by_best_hit_and_rows_by_table_position(make_retriever):
+    retriever = _row_retriever(make_retriever)
+    ebitda = _chunk(retriever, 1, "key_financials", "Adjusted EBITDA")
+    sales = _chunk(retriever, 1, "key_financials", "Sales")
+    net_debt = _chunk(retriever, 1, "cash_flow_and_leverage", "Net debt")
+
+    # Ranked by relevance: cash flow first, then key financials rows out of table order
+    merged = Retriever.reassemble([net_debt, ebitda, sales])
+
+    assert [doc.metadata.parent_id for doc in merged] == ["1/cash_flow_and_leverage", "1/key_financials"]
+    key_financials = merged[1]
+    assert key_financials.metadata.chunk_label == "Sales, Adjusted EBITDA"
+    assert key_financials.metadata.keywords == ["Sales", "Adjusted EBITDA"]
+    assert key_financials.metadata.source_url == "www.9fin.com/company_id/1/key_financials"
+
+
+def test_reassemble_emits_parent_title_once(make_retriever):
+    retriever = _row_retriever(make_retriever)
+    sales = _chunk(retriever, 1, "key_financials", "Sales")
+    ebitda = _chunk(retriever, 1, "key_financials", "Adjusted EBITDA")
+
+    [merged] = Retriever.reassemble([ebitda, sales])
+
+    title = sales.metadata.parent_title
+    assert merged.content.count(title) == 1
+    assert sales.prompt_body == sales.content.removeprefix(f"{title}\n")
+    assert merged.content == "\n".join([title, sales.prompt_body, ebitda.prompt_body])
+    assert merged.prompt_block == f"Source URL: {merged.metadata.source_url}\n\n{merged.content}"
+
+
+def test_reassemble_passes_table_documents_through(make_retriever):
+    retriever = make_retriever(chunking_mode="table", auto_load=False)
+    retriever.parse_raw_data()
+    documents = list(retriever.documents.values())[:3]
+
+    assert Retriever.reassemble(documents) == documents
+
+
+def test_checkpoint_round_trip_and_mode_mismatch(make_retriever):
+    built = make_retriever(chunking_mode="row")
+    loaded = make_retriever(chunking_mode="row", auto_load=False)
+    assert loaded._load_from_checkpoints()
+    assert loaded.documents.keys() == built.documents.keys()
+
+    other_mode = make_retriever(chunking_mode="table", auto_load=False)
+    assert not other_mode._load_from_checkpoints()
+    assert not other_mode.documents
@@ -0,0 +1,115 @@
+import math
+
+import pandas as pd
+import pytest
+
+from evaluation import run_evaluation
+from evaluation.run_evaluation import (
+    METRICS,
+    _append_jsonl,
+    _is_fully_scored,
+    _read_jsonl,
+    _sample_key,
+    load_completed_turns,
+    score_turns,
+)
+
+EVAL_TESTS = [
+    {"test_id": "T01", "turns": [
+        {"question": "What were Tronox's sales in 2024?", "ground_truth_answer": "3,074 USD millions."},
+        {"question": "And in 2023?", "ground_truth_answer": "2,850 USD millions."},
+    ]},
+    {"test_id": "T02", "turns": [
+        {"question": "What is the net leverage of Cerba?", "ground_truth_answer": "7.1x."},
+        {"question": "How did it change?", "ground_truth_answer": "It fell by 0.3x."},
+    ]},
+]
+
+
+def _turn_record(test: dict, turn_index: int, **overrides) -> dict:
+    turn = test["turns"][turn_index]
+    return {
+        "test_id": test["test_id"],
+        "turn_index": turn_index,
+        "question": turn["question"],
+        "answer": f"Answer to {turn['question']}",
+        "contexts": ["Source URL: www.9fin.com/company_id/1/key_financials"],
+        "ground_truth": turn["ground_truth_answer"],
+        **overrides,
+    }
+
+
+def _scores(value: float) -> dict:
+    return {metric.name: value for metric in METRICS}
+
+
+@pytest.fixture
+def results_path(tmp_path) -> str:
+    return str(tmp_path / "turns.jsonl")
+
+
+def test_partially_checkpointed_conversation_is_rerun(results_path):
+    t01, t02 = EVAL_TESTS
+    _append_jsonl(results_path, [_turn_record(t01, 0), _turn_record(t01, 1), _turn_record(t02, 0)])
+
+    completed = load_completed_turns(EVAL_TESTS, results_path)
+
+    assert list(completed) == ["T01"]
+    assert [turn["turn_index"] for turn in completed["T01"]] == [0, 1]
+
+
+def test_edited_question_reruns_conversation(results_path):
+    t01, _ = EVAL_TESTS
+    _append_jsonl(results_path, [_turn_record(t01, 0), _turn_record(t01, 1, question="And in 2022?")])
+
+    assert load_completed_turns(EVAL_TESTS, results_path) == {}
+
+
+def test_edited_ground_truth_is_taken_from_dataset_and_rescored(results_path):
+    t01, _ = EVAL_TESTS
+    stale = _turn_record(t01, 1, ground_truth="An outdated reference answer.")
+    _append_jsonl(results_path, [_turn_record(t01, 0), stale])
+
+    [_, turn] = load_completed_turns(EVAL_TESTS, results_path)["T01"]
+
+    assert turn["ground_truth"] == t01["turns"][1]["ground_truth_answer"]
+    assert _sample_key(turn) != _sample_key(stale)
+
+
+def test_sample_key_covers_only_what_the_judge_sees():
+    turn = _turn_record(EVAL_TESTS[0], 0)
+
+    assert _sample_key(turn) == _sample_key(dict(reversed(turn.items())))
+    assert _sample_key(turn) == _sample_key({**turn, "test_id": "T99", "turn_index": 5})
+    assert _sample_key(turn) != _sample_key({**turn, "answer": "A different answer."})
+
+
+def test_is_fully_scored_rejects_nan_and_missing_metrics():
+    assert _is_fully_scored(_scores(0.5))
+    assert not _is_fully_scored({**_scores(0.5), METRICS[0].name: math.nan})
+    assert not _is_fully_scored({**_scores(0.5), METRICS[0].name: None})
+    assert not _is_fully_scored({METRICS[0].name: 0.5})
+
+
+def test_nan_scores_are_not_cached_and_retried(tmp_path, monkeypatch):
+    cache_path = str(tmp_path / "scores_cache.jsonl")
+    ok, failed = _turn_record(EVAL_TESTS[0], 0), _turn_record(EVAL_TESTS[0], 1)
+    judged = []
+
+    def fake_evaluate(dataset, **kwargs):
+        # The judge fails (NaN) on the second turn the first time it sees it
+        rows = [_scores(math.nan if answer == failed["answer"] and not judged else 0.8) for answer in dataset["answer"]]
+        judged.append(list(dataset["answer"]))
+        return type("Result", (), {"to_pandas": lambda self: pd.DataFrame(rows)})()
+
+    monkeypatch.setattr(run_evaluation, "evaluate", fake_evaluate)
+    monkeypatch.setattr(run_evaluation, "ChatGoogleGenerativeAI", lambda **kwargs: None)
+    monkeypatch.setattr(run_evaluation, "GoogleGenerativeAIEmbeddings", lambda **kwargs: None)
+
+    first = score_turns([ok, failed], cache_path, batch_size=10, judge_workers=1)
+    assert _is_fully_scored(first[0]) and not _is_fully_scored(first[1])
+    assert [record["key"] for record in _read_jsonl(cache_path)] == [_sample_key(ok)]
+
+    second = score_turns([ok, failed], cache_path, batch_size=10, judge_workers=1)
+    assert judged[1] == [failed["answer"]]
+    assert second == [_scores(0.8), _scores(0.8)]
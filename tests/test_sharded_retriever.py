@@ -0,0 +1,126 @@
+from concurrent.futures import Future
+
+import pytest
+
+from src.common.config import settings
+from src.retriever.retriever import Retriever, shard_for_company, make_doc_id
+from src.retriever.sharded_retriever import ShardClient, ShardedRetriever
+from tests.conftest import HashingEncoder
+
+NUM_SHARDS = 3
+
+
+class InProcessShardClient(ShardClient):
+    """Serves a shard from a Retriever in this process; `hang` leaves searches pending, `fail` raises."""
+    def __init__(self, shard_id: int, retriever: Retriever, hang: bool = False, fail: bool = False):
+        super().__init__(shard_id)
+        self.retriever = retriever
+        self.hang = hang
+        self.fail = fail
+        self.calls = []
+
+    def submit_search(self, query_embedding, k, company_filter, table_filter) -> Future:
+        self.calls.append(company_filter)
+        future = Future()
+        if self.fail:
+            future.set_exception(RuntimeError("shard down"))
+        elif self.hang:
+            # Running futures cannot be cancelled, like a search already executing on the shard
+            future.set_running_or_notify_cancel()
+        else:
+            future.set_result(self.retriever.search_by_embedding(query_embedding, k, company_filter, table_filter))
+        return self._track(future)
+
+    def close(self):
+        pass
+
+
+def _shards(make_retriever, **kwargs) -> list[Retriever]:
+    return [make_retriever(shard=(i, NUM_SHARDS), **kwargs) for i in range(NUM_SHARDS)]
+
+
+def _coordinator(clients: list[InProcessShardClient]) -> ShardedRetriever:
+    sharded = object.__new__(ShardedRetriever)
+    sharded.embedding_model = HashingEncoder()
+    sharded.shards = clients
+    sharded.company_index = {
+        company: client.shard_id for client in clients for company in client.retriever.company_index
+    }
+    return sharded
+
+
+@pytest.mark.parametrize("chunking_mode", ["table", "row"])
+def test_shards_partition_companies_with_stable_unique_doc_ids(make_retriever, chunking_mode):
+    unsharded = make_retriever(chunking_mode=chunking_mode)
+    shards = _shards(make_retriever, chunking_mode=chunking_mode)
+
+    doc_ids = [doc_id for shard in shards for doc_id in shard.documents]
+    assert len(doc_ids) == len(set(doc_ids))
+    assert set(doc_ids) == set(unsharded.documents)
+
+    # Every company lives on exactly one shard, the one it hashes to
+    for shard_id, shard in enumerate(shards):
+        for doc in shard.documents.values():
+            assert shard_for_company(doc.metadata.company_id, NUM_SHARDS) == shard_id
+            assert doc == unsharded.documents[doc.doc_id]
+    companies = [company for shard in shards for company in shard.company_index]
+    assert sorted(companies) == sorted(unsharded.company_index)
+
+
+def test_make_doc_id_rejects_oversized_tables():
+    assert make_doc_id(1, "cap_table", 999) != make_doc_id(2, "key_financials", 0)
+    with pytest.raises(ValueError):
+        make_doc_id(1, "cap_table", 1_000)
+
+
+def test_search_merges_shards_by_distance(make_retriever):
+    unsharded = make_retriever()
+    sharded = _coordinator([InProcessShardClient(i, shard) for i, shard in enumerate(_shards(make_retriever))])
+
+    query = "What was the total net leverage?"
+    results = sharded.search(query, k=5)
+
+    assert [doc.doc_id for doc in results] == [doc.doc_id for doc in unsharded.search(query, k=5)]
+    assert all(client.in_flight == 0 for client in sharded.shards)
+
+
+def test_company_filtered_search_goes_to_owning_shard_only(make_retriever):
+    sharded = _coordinator([InProcessShardClient(i, shard) for i, shard in enumerate(_shards(make_retriever))])
+    company, owner = next(iter(sharded.company_index.items()))
+
+    results = sharded.search("debt structure", k=3, company_filter=company)
+
+    assert results and all(doc.metadata.company_name == company for doc in results)
+    assert [client.calls for client in sharded.shards if client.shard_id != owner] == [[]] * (NUM_SHARDS - 1)
+    assert sharded.shards[owner].calls == [company]
+
+
+def test_search_returns_partial_results_and_sheds_busy_shards(make_retriever, monkeypatch):
+    monkeypatch.setattr(settings, "SHARD_TIMEOUT_S", 0.01)
+    monkeypatch.setattr(settings, "SHARD_MAX_IN_FLIGHT", 1)
+    shards = _shards(make_retriever)
+    clients = [
+        InProcessShardClient(0, shards[0], fail=True),
+        InProcessShardClient(1, shards[1], hang=True),
+        InProcessShardClient(2, shards[2]),
+    ]
+    sharded = _coordinator(clients)
+
+    results = sharded.search("revenue", k=5)
+    assert results and {doc.doc_id for doc in results} <= set(shards[2].documents)
+
+    # The hung search is still running, so the next query skips that shard instead of queueing behind it
+    assert clients[1].in_flight == 1
+    sharded.search("revenue", k=5)
+    assert len(clients[1].calls) == 1
+
+
+def test_shard_loaded_from_checkpoint_never_loads_the_embedding_model(make_retriever):
+    built = make_retriever(shard=(1, NUM_SHARDS))
+    query_embedding = HashingEncoder().encode(["net leverage"])
+
+    loaded = make_retriever(shard=(1, NUM_SHARDS))
+    results = loaded.search_by_embedding(query_embedding, k=3)
+
+    assert loaded._embedding_model is None
+    assert results == built.search_by_embedding(query_embedding, k=3)